@@ -0,0 +1,392 @@
+"""Admission control in front of the validation views.
+
+AdmissionControlMiddleware guards POSTs to the views marked
+@admission_controlled (MakePassword, BatchValidate, StreamValidate), before
+any form is built:
+
+* Oversized input: a form POST whose body could not fit, or whose 'password'
+  field is longer than STRONG_PASSWORD_MAX_LENGTH, gets a 413 without
+  reaching the rules, and so does a JSON body (the batch API) over
+  STRONG_PASSWORD_BATCH_MAX_BYTES.
+* Rate limit: a token bucket per client, STRONG_PASSWORD_RATE_LIMIT requests
+  per second with bursts of STRONG_PASSWORD_RATE_LIMIT_BURST, implemented as
+  GCRA (one timestamp per client). The buckets are in-process, or shared by
+  every worker through STRONG_PASSWORD_RATE_LIMIT_CACHE_ALIAS. Two workers
+  racing on one client can each let a request through, so a shared bucket
+  may overshoot by about one request per worker. Over the limit is a 429
+  with Retry-After.
+* Validation queue: validation is CPU-bound and holds the GIL, so extra
+  threads only slow each other down. At most
+  STRONG_PASSWORD_VALIDATION_CONCURRENCY sync views validate at once per
+  process, and the rest wait in line for a slot. A streamed response (the
+  batch API validates while it is sent) keeps its slot until it is closed.
+* Load shedding: queue time is the time from a request's arrival to its view
+  getting a slot. Arrival is the proxy's timestamp when
+  STRONG_PASSWORD_REQUEST_START_HEADER is set, else when the request reached
+  this middleware. A request that cannot start within
+  STRONG_PASSWORD_MAX_QUEUE_MS gets a 503, since its client has most likely
+  given up. When every request in the last interval queued that long (a
+  standing queue, as in CoDel), new arrivals are turned away with a 503 at
+  once, while earlier ones are still waiting in this process.
+
+Everything above is O(1) per request and touches no database.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+# percent-encoding can take 12 bytes per code point (4 UTF-8 bytes, '%XX' each),
+# plus room for the CSRF token and field names
+_BYTES_PER_CHAR = 12
+_FORM_OVERHEAD = 4096
+_FORM_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+_JSON_TYPE = 'application/json'
+# clients tracked by the in-process buckets
+MAX_CLIENTS = 65_536
+# length of a CoDel interval: the shortest queue time seen in it decides
+# whether the next one sheds
+INTERVAL = 0.1
+
+
+def admission_controlled(view):
+    """Mark ``view`` for AdmissionControlMiddleware and queue it for a validation slot."""
+    if iscoroutinefunction(view):
+        # async views run on the event loop and are not queued, only timed
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            return _started(request, None) or await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # only POSTs the middleware admitted queue for a slot
+            slots = _validation_slots() if hasattr(request, '_admission') else None
+            response = _started(request, slots)
+            if response is not None:
+                return response
+            if slots is None or not request._admission.get('slot'):
+                return view(request, *args, **kwargs)
+            release = _SlotRelease(request._admission, slots)
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                release.close()
+                raise
+            if getattr(response, 'streaming', False):
+                # the content is produced while it is sent, so the slot is
+                # only given back when the response is closed
+                response.streaming_content = _HoldingSlot(response.streaming_content, release)
+            else:
+                release.close()
+            return response
+    wrapper.admission_controlled = True
+    return wrapper
+
+
+class _SlotRelease:
+    def __init__(self, state, slots):
+        self.state = state
+        self.slots = slots
+
+    def close(self):
+        if self.state.get('slot'):
+            self.state['slot'] = False
+            self.slots.release()
+
+
+class _HoldingSlot:
+    """Streaming content that gives the validation slot back once closed."""
+
+    def __init__(self, content, release):
+        self.content = content
+        self.close = release.close
+
+    def __iter__(self):
+        return iter(self.content)
+
+
+def _rate():
+    return getattr(settings, 'STRONG_PASSWORD_RATE_LIMIT', 0)
+
+
+def _burst():
+    return getattr(settings, 'STRONG_PASSWORD_RATE_LIMIT_BURST', 1)
+
+
+def _max_length():
+    return getattr(settings, 'STRONG_PASSWORD_MAX_LENGTH', 1024)
+
+
+def _max_queue():
+    ms = getattr(settings, 'STRONG_PASSWORD_MAX_QUEUE_MS', 0)
+    return ms / 1000 if ms else None
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def _validation_slots():
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                n = getattr(settings, 'STRONG_PASSWORD_VALIDATION_CONCURRENCY', None)
+                _slots = threading.BoundedSemaphore(n) if n else False
+    return _slots or None
+
+
+def _unavailable(message, retry_after, status):
+    response = HttpResponse(message, status=status, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# --- token buckets
+
+def _gcra(tat, now, rate, burst):
+    """``(new tat, seconds to wait)``; the request is allowed when the wait is 0."""
+    interval = 1 / rate
+    tat = max(tat or now, now)
+    allowed_at = tat + interval - burst * interval
+    if allowed_at > now:
+        return None, allowed_at - now
+    return tat + interval, 0
+
+
+class TokenBuckets:
+    """Per-client GCRA state, in-process (LRU) or in a Django cache."""
+
+    def __init__(self, alias=None, maxsize=MAX_CLIENTS):
+        self.alias = alias
+        self.maxsize = maxsize
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, client):
+        return f"strongpw:rate:{client}"
+
+    def take(self, client, rate, burst, now=None):
+        """Spend a token for ``client``; returns 0, or the seconds until one is available."""
+        now = time.time() if now is None else now
+        if self.alias:
+            cache = caches[self.alias]
+            key = self._key(client)
+            tat, wait = _gcra(cache.get(key), now, rate, burst)
+            if tat is not None:
+                cache.set(key, tat, timeout=math.ceil(tat - now) + 1)
+            return wait
+        with self._lock:
+            tat, wait = _gcra(self._local.get(client), now, rate, burst)
+            if tat is not None:
+                self._local[client] = tat
+                self._local.move_to_end(client)
+                if len(self._local) > self.maxsize:
+                    self._local.popitem(last=False)
+            return wait
+
+    async def atake(self, client, rate, burst, now=None):
+        if not self.alias:
+            return self.take(client, rate, burst, now)
+        now = time.time() if now is None else now
+        cache = caches[self.alias]
+        key = self._key(client)
+        tat, wait = _gcra(await cache.aget(key), now, rate, burst)
+        if tat is not None:
+            await cache.aset(key, tat, timeout=math.ceil(tat - now) + 1)
+        return wait
+
+
+# --- queue monitor
+
+class QueueMonitor:
+    """CoDel-style standing-queue detector over the queue times of started views."""
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.waiting = 0
+        self.overloaded = False
+        self._min = None
+        self._interval_end = 0.0
+        self._lock = threading.Lock()
+
+    def arrived(self):
+        with self._lock:
+            self.waiting += 1
+
+    def left_queue(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def _roll(self, target, now):
+        # an interval without any started request proves nothing, so the
+        # state is only kept for one interval without fresh evidence
+        if now >= self._interval_end:
+            self.overloaded = self._min is not None and self._min > target
+            self._min = None
+            self._interval_end = now + self.interval
+
+    def observe(self, delay, target, now):
+        with self._lock:
+            self._roll(target, now)
+            self._min = delay if self._min is None else min(self._min, delay)
+
+    def should_shed(self, target, now):
+        # with nothing waiting here the next request starts at once and
+        # refreshes the state, so an idle process never sheds
+        with self._lock:
+            self._roll(target, now)
+            return self.overloaded and self.waiting > 0
+
+
+QUEUE = QueueMonitor()
+
+
+def _request_start(request, now):
+    # 't=1700000000.123', or the same in milliseconds / microseconds
+    header = getattr(settings, 'STRONG_PASSWORD_REQUEST_START_HEADER', None)
+    value = request.META.get(header, '') if header else ''
+    try:
+        start = float(value.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    while start > now * 100:
+        start /= 1000
+    return start
+
+
+def _started(request, slots):
+    # called as the view starts: wait for a validation slot, record the queue
+    # time and drop the request if it was too long
+    state = getattr(request, '_admission', None)
+    if state is None:
+        return None
+    target = _max_queue()
+    if slots is not None:
+        timeout = None if target is None else max(0.0, target - (time.time() - state['arrived']))
+        state['slot'] = slots.acquire(timeout=timeout)
+    state['queued'] = False
+    QUEUE.left_queue()
+    if target is None:
+        return None
+    now = time.time()
+    delay = now - state['arrived']
+    QUEUE.observe(delay, target, now)
+    if delay > target or (slots is not None and not state['slot']):
+        if state.get('slot'):
+            state['slot'] = False
+            slots.release()
+        return _unavailable("Server is busy, please retry.", 1, 503)
+    return None
+
+
+class AdmissionControlMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.buckets = TokenBuckets(getattr(settings, 'STRONG_PASSWORD_RATE_LIMIT_CACHE_ALIAS', None))
+        # run on the event loop under ASGI, so arrivals are seen before they
+        # queue for a sync thread
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _guarded(self, request):
+        if request.method != 'POST':
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return getattr(match.func, 'admission_controlled', False)
+
+    def _client(self, request):
+        header = getattr(settings, 'STRONG_PASSWORD_CLIENT_IP_HEADER', None)
+        value = request.META.get(header, '') if header else ''
+        # X-Forwarded-For style lists start with the original client
+        return value.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+
+    def _check_size(self, request):
+        if request.content_type not in _FORM_TYPES and request.content_type != _JSON_TYPE:
+            return None
+        max_length = _max_length()
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if request.content_type == _JSON_TYPE:
+            max_bytes = getattr(settings, 'STRONG_PASSWORD_BATCH_MAX_BYTES', settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+            if length > max_bytes:
+                return HttpResponse(f"Batch bodies are limited to {max_bytes} bytes.",
+                                    status=413, content_type='text/plain; charset=utf-8')
+            return None
+        # the body is only parsed once its size is known to be reasonable
+        if (length > max_length * _BYTES_PER_CHAR + _FORM_OVERHEAD
+                or len(request.POST.get('password', '')) > max_length):
+            return HttpResponse(f"Passwords are limited to {max_length} characters.",
+                                status=413, content_type='text/plain; charset=utf-8')
+        return None
+
+    def _admit(self, request):
+        now = time.time()
+        response = self._check_size(request)
+        if response is not None:
+            return response
+        target = _max_queue()
+        if target is not None and QUEUE.should_shed(target, now):
+            return _unavailable("Server is busy, please retry.", 1, 503)
+        request._admission = {'arrived': _request_start(request, now) or now, 'queued': True}
+        QUEUE.arrived()
+        return None
+
+    def _rate_limited(self, wait):
+        return _unavailable("Too many attempts, slow down.", wait, 429)
+
+    def _leave(self, request):
+        state = getattr(request, '_admission', None)
+        # rejected before the view started (CSRF, 405, ...)
+        if state is not None and state['queued']:
+            state['queued'] = False
+            QUEUE.left_queue()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._guarded(request):
+            return self.get_response(request)
+        rate = _rate()
+        if rate:
+            wait = self.buckets.take(self._client(request), rate, _burst())
+            if wait:
+                return self._rate_limited(wait)
+        response = self._admit(request)
+        if response is not None:
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self._leave(request)
+
+    async def __acall__(self, request):
+        if not self._guarded(request):
+            return await self.get_response(request)
+        rate = _rate()
+        if rate:
+            wait = await self.buckets.atake(self._client(request), rate, _burst())
+            if wait:
+                return self._rate_limited(wait)
+        response = self._admit(request)
+        if response is not None:
+            return response
+        try:
+            return await self.get_response(request)
+        finally:
+            self._leave(request)
@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'StrongPassword.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after setup so the rule modules can read settings
+from .live import websocket_application  # noqa: E402
+
+LIVE_PATH = '/ws/validate/'
+
+
+async def application(scope, receive, send):
+    # WebSocket live validation is served here; everything else goes to Django
+    if scope['type'] == 'websocket' and scope['path'] == LIVE_PATH:
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
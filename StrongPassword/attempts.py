@@ -0,0 +1,249 @@
+"""Attempt counters and badges for MakePassword, written behind the request.
+
+Each visitor gets a signed cookie holding an id, the current run (attempts
+since the last solve, when the run started and the last attempt) and their
+best solve so far, so the badges on success.html come from the cookie alone:
+no query on the request path, and the same answer whichever worker serves the
+request. The best solve also tells leaderboard.py when a visitor moves up.
+
+The database only keeps totals per visitor (models.AttemptStats). record()
+adds the attempt to an in-memory per-visitor accumulator, and a background
+thread writes everything pending in one transaction every
+STRONG_PASSWORD_ATTEMPTS_FLUSH_EVERY attempts or
+STRONG_PASSWORD_ATTEMPTS_FLUSH_SECONDS, whichever comes first, so sqlite's
+write lock is taken once per batch instead of once per POST. Whatever is
+still pending when the process exits is flushed from an atexit hook; a
+worker that is killed outright loses at most one batch.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COOKIE = 'strongpw_attempts'
+COOKIE_MAX_AGE = 90 * 24 * 3600
+_SALT = 'StrongPassword.attempts'
+# a run left alone for longer than this starts over
+RUN_TIMEOUT = 3600
+# visitors kept in memory while the database cannot be written
+MAX_PENDING = 10_000
+
+Run = namedtuple('Run', 'visitor attempts started last best_attempts best_seconds')
+# ``run`` is what goes back into the cookie and ``previous`` what came in;
+# ``attempts`` and ``seconds`` describe the run including this attempt
+Progress = namedtuple('Progress', 'run solved attempts seconds badges previous')
+Badge = namedtuple('Badge', 'emoji title description')
+
+# (most attempts, badge), first match wins
+_ATTEMPT_BADGES = (
+    (1, Badge('🦄', 'Unicorn', 'Cracked it on the first try. Suspicious.')),
+    (3, Badge('🥇', 'Quick Thinker', 'Done in three tries or fewer.')),
+    (10, Badge('🧗', 'Persistent', 'Kept climbing for up to ten tries.')),
+    (25, Badge('🐢', 'Stubborn', 'Slow and steady, up to 25 tries.')),
+    (None, Badge('🧟', 'Password Survivor', 'More than 25 tries and still standing.')),
+)
+SPEEDRUNNER = Badge('⚡', 'Speedrunner', 'Solved within a minute of the first try.')
+MARATHONER = Badge('🕰️', 'Marathoner', 'Spent over half an hour on one password.')
+
+
+def badges(attempts, seconds):
+    """Badges for a password solved after ``attempts`` tries over ``seconds``."""
+    out = [next(badge for limit, badge in _ATTEMPT_BADGES if limit is None or attempts <= limit)]
+    if 1 < attempts and seconds <= 60:
+        out.append(SPEEDRUNNER)
+    elif seconds >= 1800:
+        out.append(MARATHONER)
+    return tuple(out)
+
+
+def _store():
+    return getattr(settings, 'STRONG_PASSWORD_ATTEMPTS_STORE', True)
+
+
+def _flush_every():
+    return getattr(settings, 'STRONG_PASSWORD_ATTEMPTS_FLUSH_EVERY', 100)
+
+
+def _flush_seconds():
+    return getattr(settings, 'STRONG_PASSWORD_ATTEMPTS_FLUSH_SECONDS', 5)
+
+
+# --- cookie
+
+def _read_run(request, now):
+    value = request.get_signed_cookie(COOKIE, default=None, salt=_SALT)
+    try:
+        visitor, attempts, started, last, best_attempts, best_seconds = value.split(':')
+        run = Run(visitor, int(attempts), float(started), float(last),
+                  int(best_attempts) if best_attempts else None,
+                  float(best_seconds) if best_seconds else None)
+    except (AttributeError, ValueError):
+        return Run(uuid.uuid4().hex, 0, now, now, None, None)
+    if not 0 <= now - run.last <= RUN_TIMEOUT:
+        return run._replace(attempts=0, started=now, last=now)
+    return run
+
+
+def remember(response, progress):
+    """Store the visitor's run in the response cookie; returns ``response``."""
+    run = progress.run
+    best_attempts = '' if run.best_attempts is None else run.best_attempts
+    best_seconds = '' if run.best_seconds is None else f'{run.best_seconds:.3f}'
+    value = f'{run.visitor}:{run.attempts}:{run.started:.3f}:{run.last:.3f}:{best_attempts}:{best_seconds}'
+    response.set_signed_cookie(
+        COOKIE, value, salt=_SALT,
+        max_age=COOKIE_MAX_AGE, httponly=True, samesite='Lax',
+    )
+    return response
+
+
+def record(request, solved, now=None):
+    """Count one MakePassword attempt; returns the visitor's Progress."""
+    now = time.time() if now is None else now
+    run = _read_run(request, now)
+    attempts = run.attempts + 1
+    seconds = now - run.started
+    if _store():
+        _add(run.visitor, solved, attempts, seconds, now - run.last)
+    if solved:
+        best = run._replace(attempts=0, started=now, last=now,
+                            best_attempts=_least(run.best_attempts, attempts),
+                            best_seconds=_least(run.best_seconds, seconds))
+        return Progress(best, True, attempts, seconds, badges(attempts, seconds), run)
+    return Progress(run._replace(attempts=attempts, last=now), False, attempts, seconds, (), run)
+
+
+# --- write-behind accumulator
+
+class _Pending:
+    __slots__ = ('attempts', 'solves', 'best_attempts', 'best_seconds', 'seconds', 'first', 'last')
+
+    def __init__(self, now):
+        self.attempts = self.solves = 0
+        self.best_attempts = self.best_seconds = None
+        self.seconds = 0.0
+        self.first = self.last = now
+
+    def merge(self, other):
+        self.attempts += other.attempts
+        self.solves += other.solves
+        self.best_attempts = _least(self.best_attempts, other.best_attempts)
+        self.best_seconds = _least(self.best_seconds, other.best_seconds)
+        self.seconds += other.seconds
+        self.first = min(self.first, other.first)
+        self.last = max(self.last, other.last)
+
+
+def _least(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_pending = {}
+_count = 0
+_wake = None
+_pid = None
+
+
+def _ensure_writer():
+    global _pending, _count, _wake, _pid
+    # a forked worker starts empty with a writer of its own
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                _pending, _count = {}, 0
+                _wake = threading.Event()
+                threading.Thread(target=_writer, args=(_wake,), name='strongpw-attempts', daemon=True).start()
+                _pid = os.getpid()
+
+
+def _writer(wake):
+    from . import leaderboard
+    while True:
+        wake.wait(_flush_seconds())
+        wake.clear()
+        flush()
+        # right after the flush, so the rebuild includes this worker's solves
+        leaderboard.checkpoint()
+
+
+def _add(visitor, solved, attempts, seconds, spent):
+    global _count
+    _ensure_writer()
+    now = timezone.now()
+    with _lock:
+        pending = _pending.get(visitor)
+        if pending is None:
+            pending = _pending[visitor] = _Pending(now)
+        pending.attempts += 1
+        pending.seconds += spent
+        pending.last = now
+        if solved:
+            pending.solves += 1
+            pending.best_attempts = _least(pending.best_attempts, attempts)
+            pending.best_seconds = _least(pending.best_seconds, seconds)
+        _count += 1
+        full = _count >= _flush_every() or len(_pending) >= MAX_PENDING
+    if full:
+        _wake.set()
+
+
+def _write(batch):
+    from .models import AttemptStats
+    close_old_connections()
+    with transaction.atomic():
+        # make sure every row exists, then add to it in place so workers
+        # flushing the same visitor never overwrite each other
+        AttemptStats.objects.bulk_create(
+            [AttemptStats(visitor=visitor, first_seen=p.first, last_seen=p.last) for visitor, p in batch.items()],
+            ignore_conflicts=True,
+        )
+        for visitor, p in batch.items():
+            changes = {
+                'attempts': F('attempts') + p.attempts,
+                'solves': F('solves') + p.solves,
+                'seconds_spent': F('seconds_spent') + p.seconds,
+                'last_seen': p.last,
+            }
+            if p.best_attempts is not None:
+                changes['best_attempts'] = Coalesce(Least('best_attempts', Value(p.best_attempts)), Value(p.best_attempts))
+                changes['best_seconds'] = Coalesce(Least('best_seconds', Value(p.best_seconds)), Value(p.best_seconds))
+            AttemptStats.objects.filter(visitor=visitor).update(**changes)
+
+
+def flush():
+    """Write all pending counters in one transaction; returns the number of visitors written."""
+    global _pending, _count
+    with _write_lock:
+        with _lock:
+            batch, _pending, _count = _pending, {}, 0
+        if not batch:
+            return 0
+        try:
+            _write(batch)
+        except DatabaseError:
+            logger.exception("Could not write attempt counters for %d visitors", len(batch))
+            # keep them for the next flush, unless the backlog is already full
+            with _lock:
+                for visitor, p in batch.items():
+                    if visitor in _pending:
+                        _pending[visitor].merge(p)
+                    elif len(_pending) < MAX_PENDING:
+                        _pending[visitor] = p
+            return 0
+        return len(batch)
+
+
+atexit.register(flush)
@@ -0,0 +1,67 @@
+import mmap
+import os
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+
+from .forms import StrongPassword
+from .rules import first_failure
+
+# Streaming audit of newline-delimited password files against the
+# StrongPassword rules. The file is split into newline-aligned byte ranges;
+# every worker maps the file itself and walks only its own range, so nothing
+# is ever read into memory as a whole and no password data crosses processes.
+
+VALID = 'valid'
+
+_field = StrongPassword.base_fields['password']
+
+
+def audit_line(line):
+    """Return the code of the first rule ``line`` fails, or VALID."""
+    try:
+        # same field cleaning as the form (strip, required, NUL check); the
+        # result cache is skipped, dump lines are almost never repeated
+        failure = first_failure(_field.clean(line))
+    except ValidationError as e:
+        return e.error_list[0].code
+    return failure[0] if failure else VALID
+
+
+def chunk_ranges(path, chunk_size):
+    """Split ``path`` into ``(start, end)`` byte ranges that end on a newline."""
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    ranges = []
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = mm.find(b'\n', min(start + chunk_size, size) - 1)
+            end = size if end == -1 else end + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def audit_range(path, start, end, collect_failures=False):
+    """Audit the lines in ``[start, end)``.
+
+    Returns ``(line_count, histogram, failures)`` where ``failures`` holds
+    ``(line_index_in_range, code)`` pairs when ``collect_failures`` is set.
+    """
+    histogram = Counter()
+    failures = []
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = mm[start:end].decode('utf-8', errors='replace').split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    for i, line in enumerate(lines):
+        line = line.rstrip('\r')
+        if not line:
+            continue
+        code = audit_line(line)
+        histogram[code] += 1
+        if collect_failures and code != VALID:
+            failures.append((i, code))
+    return len(lines), histogram, failures
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .forms import StrongPassword
+from .validators import UltraStrongPasswordValidator
+
+# Batch validation for the JSON API: passwords are split into chunks and
+# checked across a process pool, results come back in input order.
+
+VALIDATORS = ('strong', 'ultra')
+
+_pool = None
+
+
+def init_worker():
+    # forkserver workers start without an app registry
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'StrongPassword.settings')
+    django.setup()
+
+
+def worker_count():
+    return settings.STRONG_PASSWORD_BATCH_WORKERS or os.cpu_count() or 1
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        # not fork: the pool is created lazily inside a threaded web worker
+        # (the attempts writer thread among others), and forking a process
+        # that has other threads can copy a lock in its held state
+        _pool = ProcessPoolExecutor(max_workers=worker_count(), initializer=init_worker,
+                                    mp_context=multiprocessing.get_context('forkserver'))
+    return _pool
+
+
+def validate_one(password, validator='strong'):
+    """Return the list of error codes for ``password`` (empty when it passes)."""
+    if not isinstance(password, str):
+        return ['not_a_string']
+    if len(password) > settings.STRONG_PASSWORD_BATCH_MAX_LENGTH:
+        return ['too_long']
+    if validator == 'ultra':
+        if not password:
+            return ['required']
+        try:
+            UltraStrongPasswordValidator()(password)
+        except ValidationError as e:
+            return [err.code for err in e.error_list]
+        return []
+
+    form = StrongPassword({'password': password})
+    if form.is_valid():
+        return []
+    return [err.code for err in form.errors.as_data()['password']]
+
+
+def validate_chunk(offset, passwords, validator='strong'):
+    results = []
+    for i, password in enumerate(passwords, offset):
+        errors = validate_one(password, validator)
+        results.append({'index': i, 'valid': not errors, 'errors': errors})
+    return results
+
+
+def validate_batch(passwords, validator='strong'):
+    """Yield one result dict per password, in order.
+
+    Small batches are checked inline. Larger ones are fanned out to the
+    process pool with a bounded number of chunks in flight, so memory stays
+    flat however long the response stream is.
+    """
+    size = settings.STRONG_PASSWORD_BATCH_CHUNK_SIZE
+    if len(passwords) <= size:
+        yield from validate_chunk(0, passwords, validator)
+        return
+
+    pool = get_pool()
+    in_flight = 2 * worker_count()
+    pending = deque()
+    for offset in range(0, len(passwords), size):
+        pending.append(pool.submit(validate_chunk, offset, passwords[offset:offset + size], validator))
+        if len(pending) >= in_flight:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
@@ -0,0 +1,250 @@
+"""Common / breached password check backed by a memory-mapped xor filter.
+
+The filter is a prebuilt file that every worker maps read-only, so the table
+lives once in the OS page cache and is shared by all processes; a worker only
+keeps the mapping itself, no matter how many passwords the list had.
+
+An xor filter (Graf & Lemire, 2019) stores one fingerprint per slot in a table
+of about 1.23 slots per password. Each password hashes to three slots, one in
+each third of the table, and is in the list when the XOR of the three slots
+equals its fingerprint. A lookup is one BLAKE2 hash, a few integer operations
+and three reads, whatever the size of the list. There are no false negatives;
+the false positive rate is 2**-bits (16-bit fingerprints by default: about 1 in
+65,000), so a rare strong password can be rejected as common, never the
+other way around.
+
+File layout: one JSON header line, zero padding up to a 64-byte boundary,
+then the table of ``slots`` little-endian fingerprints. The default filter
+(data/common-passwords.xor) is built from Django's CommonPasswordValidator
+list; point STRONG_PASSWORD_BREACHED_FILTER at a bigger one made with
+`manage.py build_breached_filter`.
+"""
+import json
+import math
+import mmap
+import sys
+from hashlib import blake2b
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+DATA_FILE = Path(__file__).resolve().parent / "data" / "common-passwords.xor"
+
+FORMAT = 'xor-filter-1'
+ALIGN = 64
+# fingerprint width -> memoryview format
+_TYPECODES = {8: 'B', 16: 'H', 32: 'I'}
+MAX_SEEDS = 32
+
+_M64 = (1 << 64) - 1
+_M32 = (1 << 32) - 1
+
+_filter = None
+_loaded = False
+
+
+def key_of(value):
+    """64-bit hash of a password, the only thing the filter ever sees."""
+    return int.from_bytes(blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+
+def _multiplier(seed):
+    # the keys are already uniform; a build that does not peel retries with
+    # the keys multiplied by another odd constant (a bijection), derived from
+    # the seed with the splitmix64 finalizer
+    z = (seed + 0x9E3779B97F4A7C15) & _M64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _M64
+    return (z ^ (z >> 31)) | 1
+
+
+class XorFilter:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as fh:
+            header = json.loads(fh.readline())
+            if header.get('format') != FORMAT:
+                raise ValueError(f"{self.path} is not a {FORMAT} file.")
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries = header['entries']
+        self.seed = header['seed']
+        self.segment = header['segment']
+        self.bits = header['bits']
+        self.lowercase = header.get('lowercase', False)
+        self.source = header.get('source')
+        offset = header['offset']
+        size = 3 * self.segment * self.bits // 8
+        if header.get('byteorder', 'little') != sys.byteorder:
+            raise ValueError(f"{self.path} was built for a {header['byteorder']}-endian machine.")
+        if len(self._mm) < offset + size:
+            raise ValueError(f"{self.path} is truncated.")
+        self._table = memoryview(self._mm)[offset:offset + size].cast(_TYPECODES[self.bits])
+        self._fp_mask = (1 << self.bits) - 1
+        self._multiplier = _multiplier(self.seed)
+
+    def __contains__(self, value):
+        if self.lowercase:
+            value = value.lower()
+        # key_of() inlined, this is the hot path
+        digest = blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+        z = (int.from_bytes(digest, 'little') * self._multiplier) & _M64
+        n = self.segment
+        t = self._table
+        fingerprint = (z ^ (z >> 32)) & self._fp_mask
+        return fingerprint == (
+            t[((z & _M32) * n) >> 32]
+            ^ t[n + ((((z >> 21) & _M32) * n) >> 32)]
+            ^ t[2 * n + (((((z >> 42) | (z << 22)) & _M32) * n) >> 32)]
+        )
+
+    def close(self):
+        self._table.release()
+        self._mm.close()
+
+
+def _header_line(header):
+    # the header records where the table starts, so settle the offset first
+    while True:
+        text = json.dumps(header).encode() + b'\n'
+        offset = -(-len(text) // ALIGN) * ALIGN
+        if offset == header['offset']:
+            return text.ljust(offset, b'\0')
+        header['offset'] = offset
+
+
+def _hash_lines(lines, lowercase, chunk_size):
+    import numpy as np
+    chunks, chunk = [], []
+    for line in lines:
+        password = line.rstrip('\r\n')
+        if not password:
+            continue
+        chunk.append(key_of(password.lower() if lowercase else password))
+        if len(chunk) >= chunk_size:
+            chunks.append(np.array(chunk, dtype=np.uint64))
+            chunk = []
+    chunks.append(np.array(chunk, dtype=np.uint64))
+    # duplicates would never peel
+    return np.unique(np.concatenate(chunks))
+
+
+def _slots(keys, seed, segment):
+    """``(len(keys), 3)`` slots and the fingerprints, as XorFilter.__contains__ computes them."""
+    import numpy as np
+    u = np.uint64
+    with np.errstate(over='ignore'):
+        z = keys * u(_multiplier(seed))
+        n = u(segment)
+        slots = np.empty((len(keys), 3), dtype=np.int64)
+        slots[:, 0] = ((z & u(_M32)) * n) >> u(32)
+        slots[:, 1] = n + ((((z >> u(21)) & u(_M32)) * n) >> u(32))
+        slots[:, 2] = u(2) * n + (((((z >> u(42)) | (z << u(22))) & u(_M32)) * n) >> u(32))
+    return slots, z ^ (z >> u(32))
+
+
+def _peel(keys, seed, segment):
+    # Repeatedly take every slot that holds exactly one key and remove that
+    # key from its three slots, a whole round at a time. Returns the rounds
+    # as (keys, own slots), or None when some keys never end up alone.
+    import numpy as np
+    slots, _ = _slots(keys, seed, segment)
+    flat = slots.ravel()
+    count = np.bincount(flat, minlength=3 * segment).astype(np.int32)
+    xor = np.zeros(3 * segment, dtype=np.uint64)
+    np.bitwise_xor.at(xor, flat, np.repeat(keys, 3))
+    rounds = []
+    peeled = 0
+    candidates = np.flatnonzero(count == 1)
+    while candidates.size:
+        candidates = candidates[count[candidates] == 1]
+        if not candidates.size:
+            break
+        # a key alone in two of its slots is taken once
+        round_keys, first = np.unique(xor[candidates], return_index=True)
+        own = candidates[first]
+        positions = np.searchsorted(keys, round_keys)
+        touched = slots[positions].ravel()
+        np.subtract.at(count, touched, 1)
+        np.bitwise_xor.at(xor, touched, np.repeat(round_keys, 3))
+        rounds.append((positions, own))
+        peeled += len(round_keys)
+        candidates = np.unique(touched[count[touched] == 1])
+    return rounds if peeled == len(keys) else None
+
+
+def build(lines, output, bits=16, lowercase=False, source=None, chunk_size=1 << 20):
+    """Write a filter for the passwords in ``lines``; returns the header.
+
+    Needs about 30 bytes of memory per password while building (the hashes,
+    the per-slot counts and XORs, and the table).
+    """
+    import numpy as np
+
+    if bits not in _TYPECODES:
+        raise ValueError(f"bits must be one of {', '.join(map(str, _TYPECODES))}.")
+    keys = _hash_lines(lines, lowercase, chunk_size)
+    segment = max(1, math.ceil((1.23 * len(keys) + 32) / 3))
+    for seed in range(MAX_SEEDS):
+        rounds = _peel(keys, seed, segment)
+        if rounds is not None:
+            break
+    else:
+        raise ValueError(f"Could not build the filter in {MAX_SEEDS} attempts.")
+
+    slots, fingerprints = _slots(keys, seed, segment)
+    fingerprints = (fingerprints & np.uint64((1 << bits) - 1)).astype(f'<u{bits // 8}')
+    table = np.zeros(3 * segment, dtype=fingerprints.dtype)
+    # last peeled first: a key's other two slots are only taken by keys peeled
+    # after it, so they are final by the time its own slot is set
+    for positions, own in reversed(rounds):
+        s = slots[positions]
+        table[own] = fingerprints[positions] ^ table[s[:, 0]] ^ table[s[:, 1]] ^ table[s[:, 2]]
+
+    header = {
+        'format': FORMAT, 'entries': int(len(keys)), 'seed': seed, 'segment': segment, 'bits': bits,
+        'lowercase': lowercase, 'byteorder': 'little', 'source': source, 'offset': 0,
+    }
+    line = _header_line(header)
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + '.tmp')
+    with open(tmp, 'wb') as fh:
+        fh.write(line)
+        fh.write(table.tobytes())
+    # replace atomically, workers that already mapped the old file keep it
+    tmp.replace(output)
+    return header
+
+
+def _configured_path():
+    path = getattr(settings, 'STRONG_PASSWORD_BREACHED_FILTER', None)
+    if path is False:
+        return None
+    return path or DATA_FILE
+
+
+def get_filter():
+    """The configured XorFilter, opened on first use; None when turned off."""
+    global _filter, _loaded
+    if not _loaded:
+        path = _configured_path()
+        _filter = XorFilter(path) if path else None
+        _loaded = True
+    return _filter
+
+
+def is_breached(value):
+    xor_filter = get_filter()
+    return xor_filter is not None and value in xor_filter
+
+
+class BreachedPasswordValidator:
+    """AUTH_PASSWORD_VALIDATORS entry: Django's CommonPasswordValidator on the shared filter."""
+
+    def validate(self, password, user=None):
+        if is_breached(password.strip()):
+            raise ValidationError("This password is too common.", code='password_too_common')
+
+    def get_help_text(self):
+        return "Your password can’t be a commonly used password."
@@ -0,0 +1,198 @@
+"""NumPy batch mode of UltraStrongPasswordValidator for offline audits.
+
+Passwords are encoded into a zero-padded UTF-32 code-point matrix (one row
+per password). Every distinct code point in the batch is classified once, and
+the per-character rules become column-wise array operations over all rows at
+once. The few rules that need substring search (word lists, palindromes, the
+reversed weekday, dart-score prefixes, emoji sequences) reuse the same C-level string helpers
+as the scalar validator, one call per row.
+
+The result matches ``UltraStrongPasswordValidator.evaluate`` rule for rule.
+Rows the scalar validator cannot evaluate at all (the empty string) have an
+all-False column and are listed in ``BulkResult.invalid``.
+
+Every row is padded to the longest password, so audit large dumps in batches
+of similar length.
+"""
+import datetime
+
+import numpy as np
+
+from . import charclass, wordlists
+from .charclass import ALPHA, DECIMAL, DIGIT, EMOJI, EMOJI_START, MUSICAL_NOTES, NOTE, UPPER, VOWEL
+from .emojis import contains_emoji
+from .palindromes import contains_palindrome
+from .validators import DART_SCORES, RULE_CODES
+
+# digits that read as letters upside down (see _is_calculator_compatible)
+CALCULATOR_DIGITS = frozenset('013456789')
+
+
+class BulkResult:
+    def __init__(self, rules, passed, invalid):
+        self.rules = rules          # rule codes, row order of ``passed``
+        self.passed = passed        # bool matrix, rules x passwords
+        self.invalid = invalid      # indexes the scalar validator raises on
+
+    def valid(self):
+        """Bool vector: True where a password passes every rule."""
+        return self.passed.all(axis=0)
+
+    def row(self, code):
+        return self.passed[self.rules.index(code)]
+
+
+def encode(passwords):
+    """Return ``(codepoints, lengths)`` for a list of passwords."""
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+    width = max(int(lengths.max(initial=0)), 1)
+    cps = np.array(passwords, dtype=f'<U{width}').view(np.uint32).reshape(len(passwords), width)
+    return cps, lengths
+
+
+def _is_prime_table(limit):
+    sieve = np.ones(max(limit + 1, 2), dtype=bool)
+    sieve[:2] = False
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = False
+    return sieve
+
+
+_STAGE1 = np.frombuffer(charclass.STAGE1, dtype=np.uint16).astype(np.int64)
+_STAGE2 = np.frombuffer(charclass.STAGE2, dtype=np.uint16)
+
+
+def _table_flags(cps):
+    """charclass flags of an array of code points, looked up column-wise."""
+    cps = cps.astype(np.int64)
+    return _STAGE2[(_STAGE1[cps >> 8] << 8) | (cps & 0xFF)]
+
+
+def _classify(uniq, special_chars, maiden_letter):
+    """Per-distinct-code-point feature columns, indexed like ``uniq``."""
+    chars = [chr(cp) for cp in uniq.tolist()]
+    lowers = [c.lower() for c in chars]
+    flags = _table_flags(uniq)
+    digit = (flags & DIGIT) != 0
+
+    def col(values, dtype=bool):
+        return np.fromiter(values, dtype=dtype, count=len(chars))
+
+    return {
+        'upper': (flags & UPPER) != 0,
+        'special': col(c in special_chars for c in chars),
+        'digit': digit,
+        # -1 for digits such as '²' that have no value for int()
+        'digit_value': col((int(c) if f & DECIMAL else -1 if f & DIGIT else 0
+                            for c, f in zip(chars, flags.tolist())), np.int64),
+        'alpha': (flags & ALPHA) != 0,
+        'vowel': (flags & VOWEL) != 0,
+        'emoji_candidate': (flags & (EMOJI | EMOJI_START)) != 0,
+        'note': (flags & NOTE) != 0,
+        'snake': col(any(x in 'snake' for x in low) for low in lowers),
+        'death': col(any(x in 'death' for x in low) for low in lowers),
+        'meow': col((sum(1 for x in low if x in 'meow') for low in lowers), np.int64),
+        'maiden': col(c.lower() == maiden_letter for c in chars),
+        'bad_calc': digit & col(c not in CALCULATOR_DIGITS for c in chars),
+    }
+
+
+def evaluate_many(validator, passwords, now=None):
+    """Evaluate every rule of ``validator`` for every password at once."""
+    passwords = list(passwords)
+    n = len(passwords)
+    now = now or datetime.datetime.now()
+    if not n:
+        return BulkResult(RULE_CODES, np.zeros((len(RULE_CODES), 0), dtype=bool), np.zeros(0, dtype=np.int64))
+
+    cps, lengths = encode(passwords)
+    uniq, inv = np.unique(cps, return_inverse=True)
+    inv = inv.reshape(cps.shape)
+    t = _classify(uniq, validator.special_chars, validator.mothers_maiden_letter)
+    mask = np.arange(cps.shape[1]) < lengths[:, None]
+
+    def count(name):
+        return (t[name][inv] & mask).sum(axis=1)
+
+    def has(name):
+        return (t[name][inv] & mask).any(axis=1)
+
+    rows = np.arange(n)
+    first = inv[:, 0]
+    last = inv[rows, np.maximum(lengths - 1, 0)]
+
+    digit_count = count('digit')
+    digit_values = np.where(mask, t['digit_value'][inv], 0)
+    bad_digit = (digit_values < 0).any(axis=1)
+    digit_sum = np.maximum(digit_values, 0).sum(axis=1)
+    alpha = t['alpha'][inv] & mask
+    is_prime = _is_prime_table(int(digit_sum.max(initial=0)))
+
+    # substring rules, one C-level call per row
+    vals = [p.lower() for p in passwords]
+    hits = [wordlists.WORDS.search(v) for v in vals]
+    has_palindrome = np.fromiter(
+        (contains_palindrome(''.join(c.lower() for c in p if c.isalnum()), 3) for p in passwords),
+        dtype=bool, count=n)
+    # sequences need the grapheme scan, only run on rows with a candidate character
+    candidates = has('emoji_candidate')
+    has_emoji = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero(candidates).tolist():
+        has_emoji[i] = contains_emoji(passwords[i])
+    day = now.strftime("%A")[::-1].lower()
+
+    def hit(group):
+        return np.fromiter((group in h for h in hits), dtype=bool, count=n)
+
+    def word(group):
+        # honours the validator's own word list, see CUSTOM_WORD_LISTS
+        return np.fromiter((validator.has_word(group, h, v) for h, v in zip(hits, vals)), dtype=bool, count=n)
+
+    if frozenset(validator.musical_notes) == MUSICAL_NOTES:
+        has_note = has('note')
+    else:
+        # customised notes are not in the table, same fallback as evaluate()
+        has_note = np.fromiter((any(note in p for note in validator.musical_notes) for p in passwords),
+                               dtype=bool, count=n)
+
+    root = np.floor(np.sqrt(lengths)).astype(np.int64)
+    ascii_sum = np.where(mask, cps, 0).astype(np.uint64).sum(axis=1)
+    meow = (np.where(mask, t['meow'][inv], 0)).sum(axis=1)
+
+    columns = {
+        'too_short': lengths >= 8,
+        'uppercase': has('upper'),
+        'special': has('special'),
+        'three_digits': digit_count >= 3,
+        'prime_digit_sum': ~bad_digit & is_prime[digit_sum],
+        'no_vowels': ~has('vowel'),
+        'start_end_special': t['special'][first] & t['special'][last],
+        'emoji': has_emoji,
+        'palindrome': has_palindrome,
+        'ninety': hit(wordlists.NINETY),
+        'password_word': hit(wordlists.PASSWORD),
+        'consecutive_letters': ~(alpha[:, 1:] & alpha[:, :-1]).any(axis=1),
+        'length_hour': lengths == now.hour,
+        'country': word(wordlists.COUNTRY),
+        'musical_note': has_note,
+        'weekday_reversed': np.fromiter((day in v for v in vals), dtype=bool, count=n),
+        'no_snake': ~has('snake'),
+        'spaceship': word(wordlists.SPACESHIP),
+        'maiden_letter': t['maiden'][first],
+        'length_square': root * root == lengths,
+        'number_69_420': hit(wordlists.NUMBER_69_420),
+        'meow': (meow >= 1) & (meow <= 2),
+        'non_ascii': ((cps > 127) & mask).any(axis=1),
+        'ascii_sum_mod_7': ascii_sum % 7 == 0,
+        'no_death': ~has('death'),
+        'alnum_palindrome': has_palindrome,
+        'calculator': ~has('bad_calc'),
+        'dart_score': np.fromiter((p.startswith(DART_SCORES) for p in passwords), dtype=bool, count=n),
+        'spice': word(wordlists.SPICE),
+    }
+    passed = np.stack([columns[code] for code in RULE_CODES])
+
+    invalid = np.flatnonzero(lengths == 0)
+    passed[:, invalid] = False
+    return BulkResult(RULE_CODES, passed, invalid)
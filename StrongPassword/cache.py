@@ -0,0 +1,99 @@
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+# Validation results are a pure function of the password and the current
+# (hour, weekday), so they are cached per time bucket. Keys are a keyed
+# BLAKE2 hash of the password, never the plaintext. Every entry carries its
+# bucket in the key, so it stops matching the moment the hour rolls over; the
+# local LRU is also dropped then, and shared entries expire at the boundary.
+
+MISS = object()
+
+
+def _bucket(now):
+    return now.strftime('%Y%m%d%H')
+
+
+def _seconds_left(now):
+    return 3600 - (now.minute * 60 + now.second)
+
+
+class ResultCache:
+    def __init__(self, maxsize=4096, alias=None):
+        self.maxsize = maxsize
+        self.alias = alias
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._bucket = None
+        self._lock = threading.Lock()
+        self._secret = hashlib.sha256(b'StrongPassword.cache:' + settings.SECRET_KEY.encode()).digest()
+
+    def key(self, namespace, password, now):
+        digest = hashlib.blake2b(
+            password.encode('utf-8', 'surrogatepass'),
+            key=self._secret, digest_size=16, person=namespace.encode()[:16],
+        ).hexdigest()
+        return f"strongpw:{namespace}:{_bucket(now)}:{digest}"
+
+    def get(self, namespace, password, now=None):
+        """Return the cached result or MISS."""
+        now = now or datetime.datetime.now()
+        key = self.key(namespace, password, now)
+        with self._lock:
+            if self._bucket != _bucket(now):
+                self._entries.clear()
+                self._bucket = _bucket(now)
+            result = self._entries.get(key, MISS)
+            if result is not MISS:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if result is MISS and self.alias:
+            result = caches[self.alias].get(key, MISS)
+            if result is not MISS:
+                self._remember(key, result)
+                with self._lock:
+                    self.hits += 1
+        if result is MISS:
+            with self._lock:
+                self.misses += 1
+        if metrics.enabled:
+            # summed across workers on /metrics, unlike stats()
+            metrics.record_cache(result is not MISS)
+        return result
+
+    def set(self, namespace, password, result, now=None):
+        now = now or datetime.datetime.now()
+        key = self.key(namespace, password, now)
+        self._remember(key, result)
+        if self.alias:
+            caches[self.alias].set(key, result, timeout=_seconds_left(now))
+
+    def _remember(self, key, result):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+RESULTS = ResultCache(
+    maxsize=settings.STRONG_PASSWORD_RESULT_CACHE_SIZE,
+    alias=settings.STRONG_PASSWORD_RESULT_CACHE_ALIAS,
+)
@@ -0,0 +1,246 @@
+import json
+import string
+import sys
+import unicodedata
+import warnings
+import zlib
+from array import array
+from importlib import metadata
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Code point -> class bit flags, looked up instead of calling str.isupper(),
+# isdigit(), ... and testing set membership for every character.
+#
+# The table is two-level: STAGE1 maps each 256-code-point block to a block
+# index, STAGE2 holds the distinct blocks (only ~140 for all of Unicode, since
+# most planes are unassigned). The BMP is expanded into a flat array at load,
+# so nearly every character is a single index operation; astral code points
+# take one extra step.
+#
+# Classifying all 0x110000 code points takes a couple of seconds and imports
+# the emoji package, so it is never done at import. One prebuilt table per
+# Unicode database version ships in data/ (charclass-<unicode>.bin, one for
+# each supported Python); on an interpreter with no matching table the first
+# lookup raises ImproperlyConfigured until `manage.py build_charclass` writes
+# one. A table built against another version of the emoji package is still
+# used, with a warning, since only brand-new emoji would be missed.
+
+SPECIALS = frozenset("!@#$%^&*()-_+=[]{};:,.<>?/|\\~")
+MUSICAL_NOTES = frozenset("♪♫♬")
+GREEK_LETTERS = frozenset("αβγδεζηθλμνξοπρστυφχψω")
+VOWELS = "aeiou"
+N_TO_Z = "nopqrstuvwxyz"
+PUNCTUATION = ".,;:"
+BINARY_DIGITS = "01"
+HEX_DIGITS = frozenset(string.hexdigits)
+
+# class bits; more than 8 of them, so entries are 16-bit
+UPPER = 1 << 0      # str.isupper()
+LOWER = 1 << 1      # str.islower()
+DIGIT = 1 << 2      # str.isdigit()
+ALPHA = 1 << 3      # str.isalpha()
+ALNUM = 1 << 4      # str.isalnum()
+SPECIAL = 1 << 5    # in SPECIALS
+EMOJI = 1 << 6      # an emoji on its own (see emojis.py for sequences)
+GREEK = 1 << 7      # in GREEK_LETTERS
+NOTE = 1 << 8       # in MUSICAL_NOTES
+NZ = 1 << 9         # lower-cases to something containing n-z
+PUNCT = 1 << 10     # in PUNCTUATION
+BINARY = 1 << 11    # '0' or '1'
+VOWEL = 1 << 12     # lower-cases to something containing a vowel
+HEX = 1 << 13       # hexadecimal digit
+DECIMAL = 1 << 14   # str.isdecimal(), i.e. int() accepts it
+EMOJI_START = 1 << 15   # first code point of a multi-code-point emoji
+
+LAYOUT_VERSION = 1
+BLOCK = 256
+PLANES_END = 0x110000
+# code points remembered by each TranslateTable
+MAX_CACHED = 4096
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+DATA_FILE = DATA_DIR / f"charclass-{unicodedata.unidata_version}.bin"
+
+
+def code_point_flags(c, emoji_data=(), emoji_starts=()):
+    """Class bits of the single character ``c``, computed the slow way."""
+    flags = 0
+    if c.isupper():
+        flags |= UPPER
+    if c.islower():
+        flags |= LOWER
+    if c.isdigit():
+        flags |= DIGIT
+    if c.isalpha():
+        flags |= ALPHA
+    if c.isalnum():
+        flags |= ALNUM
+    if c.isdecimal():
+        flags |= DECIMAL
+    if c in SPECIALS:
+        flags |= SPECIAL
+    if c in emoji_data:
+        flags |= EMOJI
+    if c in emoji_starts:
+        flags |= EMOJI_START
+    if c in GREEK_LETTERS:
+        flags |= GREEK
+    if c in MUSICAL_NOTES:
+        flags |= NOTE
+    if c in PUNCTUATION:
+        flags |= PUNCT
+    if c in BINARY_DIGITS:
+        flags |= BINARY
+    if c in HEX_DIGITS:
+        flags |= HEX
+    low = c.lower()
+    if any(x in N_TO_Z for x in low):
+        flags |= NZ
+    if any(x in VOWELS for x in low):
+        flags |= VOWEL
+    return flags
+
+
+def _emoji_version():
+    try:
+        return metadata.version("emoji")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def build():
+    """Classify every code point; returns ``(stage1, stage2)`` arrays."""
+    # only needed here, importing emoji is slow and its data is large
+    import emoji
+    data = emoji.EMOJI_DATA
+    starts = frozenset(e[0] for e in data if len(e) > 1)
+    stage1 = array('H')
+    stage2 = array('H')
+    blocks = {}
+    for base in range(0, PLANES_END, BLOCK):
+        block = array('H', [code_point_flags(chr(cp), data, starts) for cp in range(base, base + BLOCK)])
+        key = block.tobytes()
+        index = blocks.get(key)
+        if index is None:
+            index = blocks[key] = len(blocks)
+            stage2.extend(block)
+        stage1.append(index)
+    return stage1, stage2
+
+
+def _header():
+    return {
+        "layout": LAYOUT_VERSION,
+        "unicode": unicodedata.unidata_version,
+        "emoji": _emoji_version(),
+        "byteorder": sys.byteorder,
+    }
+
+
+def save(path=DATA_FILE):
+    stage1, stage2 = build()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = _header()
+    header["blocks"] = len(stage2) // BLOCK
+    with open(path, "wb") as fh:
+        fh.write(json.dumps(header).encode() + b"\n")
+        fh.write(zlib.compress(stage1.tobytes() + stage2.tobytes(), 9))
+    return header
+
+
+def load(path=DATA_FILE):
+    """Read a prebuilt table, or return None if it is missing or stale."""
+    try:
+        with open(path, "rb") as fh:
+            header = json.loads(fh.readline())
+            body = zlib.decompress(fh.read())
+    except (OSError, ValueError, zlib.error):
+        return None
+    expected = _header()
+    byteorder = header.get("byteorder")
+    if any(header.get(k) != expected[k] for k in ("layout", "unicode")):
+        return None
+    if expected["emoji"] is not None and header.get("emoji") != expected["emoji"]:
+        warnings.warn(
+            f"{path} was built with emoji {header.get('emoji')}, emoji {expected['emoji']} is "
+            "installed; run `manage.py build_charclass` to pick up new emoji.",
+            RuntimeWarning,
+        )
+    table = array('H')
+    table.frombytes(body)
+    if byteorder != sys.byteorder:
+        table.byteswap()
+    split = PLANES_END // BLOCK
+    if len(table) != split + header.get("blocks", -1) * BLOCK:
+        return None
+    return table[:split], table[split:]
+
+
+def _missing():
+    return ImproperlyConfigured(
+        f"No character class table for Unicode {unicodedata.unidata_version} "
+        f"({DATA_FILE.name} is missing or unreadable). Run `manage.py build_charclass` to create it."
+    )
+
+
+_tables = load()
+
+if _tables is not None:
+    STAGE1, STAGE2 = _tables
+
+    # the whole BMP, flattened
+    BMP = array('H')
+    for _index in STAGE1[:0x10000 // BLOCK]:
+        BMP.extend(STAGE2[_index * BLOCK:(_index + 1) * BLOCK])
+    del _index
+
+    def flags_of(c):
+        """Class bits of the character ``c``."""
+        cp = ord(c)
+        if cp < 0x10000:
+            return BMP[cp]
+        return STAGE2[(STAGE1[cp >> 8] << 8) | (cp & 0xFF)]
+else:
+    # importing still works, so build_charclass can run
+    def flags_of(c):
+        raise _missing()
+
+    def __getattr__(name):
+        if name in ("STAGE1", "STAGE2", "BMP"):
+            raise _missing()
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class TranslateTable(dict):
+    """Code point -> ``convert(flags)``, filled on use.
+
+    Works with ``str.translate()`` and ``map(table.__getitem__, ...)``, so a
+    whole password is looked up in C; only code points not seen before call
+    back into Python. At most MAX_CACHED of them are kept, so odd input
+    cannot grow it without bound.
+    """
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, cp):
+        value = self.convert(flags_of(chr(cp)))
+        if len(self) < MAX_CACHED:
+            self[cp] = value
+        return value
+
+
+# the class bits of each code point, as an int
+CLASS_FLAGS = TranslateTable(int)
+
+
+def union(value):
+    """Bitwise OR of the class bits of every character in ``value``."""
+    flags = 0
+    for c in set(value):
+        flags |= flags_of(c)
+    return flags
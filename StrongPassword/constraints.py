@@ -0,0 +1,180 @@
+"""Static satisfiability analysis of the rule sets.
+
+Some rule combinations can never be met, e.g. UltraStrongPasswordValidator's
+"length == current hour" + "perfect square" + "at least 8" only leaves 9 and
+16 o'clock. Rules are described here as simple constraints on the length,
+the first character, forbidden letters and required words; analyze() finds
+the minimal combinations that no password can satisfy. Validators run the
+analysis once per (hour, weekday) and reject straight away while their rule
+set is unsatisfiable, instead of running every rule on every attempt.
+
+Conflicts that involve a clock rule (CLOCK_RULES) only hold for this hour or
+day; the others hold at any time and are reported as such.
+"""
+import datetime
+import threading
+from collections import namedtuple
+from itertools import combinations
+
+
+# Longest length tried when looking for an admissible one; rules that only
+# bound length from below are always satisfiable beyond that.
+LENGTH_CAP = 1024
+
+Length = namedtuple('Length', 'code test')              # test(length) -> bool
+FirstChar = namedtuple('FirstChar', 'code allowed')      # allowed: set of chars
+Forbidden = namedtuple('Forbidden', 'code letters')      # letters banned from value.lower()
+RequireOne = namedtuple('RequireOne', 'code words')      # value.lower() must contain one
+
+Conflict = namedtuple('Conflict', 'codes')
+
+# rules whose constraint changes with the current hour or weekday
+CLOCK_RULES = frozenset({'length_hour', 'weekday_reversed'})
+
+
+def _describe(conflicts):
+    first = ' + '.join(conflicts[0].codes)
+    more = len(conflicts) - 1
+    extra = f" and {more} more conflicting combination{'s' if more != 1 else ''}" if more else ""
+    return first + extra
+
+
+class Analysis:
+    def __init__(self, conflicts, lengths):
+        self.conflicts = conflicts
+        self.lengths = lengths      # admissible lengths up to LENGTH_CAP
+
+    @property
+    def satisfiable(self):
+        return not self.conflicts
+
+    @property
+    def static_conflicts(self):
+        """Conflicts that hold at any hour."""
+        return [c for c in self.conflicts if not CLOCK_RULES.intersection(c.codes)]
+
+    @property
+    def clock_conflicts(self):
+        """Conflicts that involve the current hour or weekday."""
+        return [c for c in self.conflicts if CLOCK_RULES.intersection(c.codes)]
+
+    @property
+    def message(self):
+        static, clock = self.static_conflicts, self.clock_conflicts
+        if not static:
+            return f"⏳ No password can satisfy these rules this hour ({_describe(clock)})."
+        message = f"⛔ No password can satisfy these rules at any time ({_describe(static)})."
+        if clock:
+            message += f" This hour adds {_describe(clock)}."
+        return message
+
+
+def _minimal_conflicts(rules, consistent):
+    """Smallest subsets of ``rules`` for which ``consistent`` is False."""
+    found = []
+    for size in range(1, len(rules) + 1):
+        for subset in combinations(rules, size):
+            codes = {r.code for r in subset}
+            if any(set(c.codes) <= codes for c in found):
+                continue
+            if not consistent(subset):
+                found.append(Conflict(tuple(r.code for r in subset)))
+    return found
+
+
+def _admissible_lengths(rules):
+    return [n for n in range(1, LENGTH_CAP + 1) if all(r.test(n) for r in rules)]
+
+
+def _first_char_ok(rules):
+    allowed = None
+    for r in rules:
+        if isinstance(r, FirstChar):
+            allowed = set(r.allowed) if allowed is None else allowed & r.allowed
+    if allowed is None:
+        return True
+    banned = set().union(*(r.letters for r in rules if isinstance(r, Forbidden)))
+    return any(not set(c.lower()) & banned for c in allowed)
+
+
+def _words_ok(rules):
+    banned = set().union(*(r.letters for r in rules if isinstance(r, Forbidden)))
+    return all(any(not set(w) & banned for w in r.words)
+               for r in rules if isinstance(r, RequireOne))
+
+
+def analyze(constraints):
+    length_rules = [r for r in constraints if isinstance(r, Length)]
+    char_rules = [r for r in constraints if isinstance(r, (FirstChar, Forbidden))]
+    word_rules = [r for r in constraints if isinstance(r, (RequireOne, Forbidden))]
+
+    conflicts = _minimal_conflicts(length_rules, lambda rs: _admissible_lengths(rs))
+    conflicts += _minimal_conflicts(char_rules, _first_char_ok)
+    conflicts += [c for c in _minimal_conflicts(word_rules, _words_ok) if c not in conflicts]
+    return Analysis(conflicts, _admissible_lengths(length_rules))
+
+
+def _is_square(n):
+    return int(n**0.5) ** 2 == n
+
+
+def form_constraints():
+    from .rules import SPECIALS
+    return [
+        Length('too_short', lambda n: n >= 8),
+        Length('length_multiple_of_4', lambda n: n % 4 == 0),
+        Length('length_square', _is_square),
+        FirstChar('start_special', set(SPECIALS)),
+    ]
+
+
+def ultra_constraints(validator, now):
+    from .validators import DART_SCORES
+    letter = validator.mothers_maiden_letter
+    return [
+        Length('too_short', lambda n: n >= 8),
+        Length('length_hour', lambda n: n == now.hour),
+        Length('length_square', _is_square),
+        FirstChar('start_end_special', set(validator.special_chars)),
+        FirstChar('maiden_letter', {letter, letter.upper()}),
+        FirstChar('dart_score', {score[0] for score in DART_SCORES}),
+        Forbidden('no_vowels', set('aeiou')),
+        Forbidden('no_snake', set('snake')),
+        Forbidden('no_death', set('death')),
+        RequireOne('password_word', ['password']),
+        RequireOne('country', [w.lower() for w in validator.nonexistent_countries]),
+        RequireOne('weekday_reversed', [now.strftime("%A")[::-1].lower()]),
+        RequireOne('spaceship', [w.lower() for w in validator.fictional_spaceships]),
+        RequireOne('spice', [w.lower() for w in validator.spices]),
+    ]
+
+
+# The form rules do not depend on the clock, so they are analysed once.
+_form_analysis = None
+_ultra_analyses = {}
+_ultra_lock = threading.Lock()
+
+
+def form_analysis():
+    global _form_analysis
+    if _form_analysis is None:
+        _form_analysis = analyze(form_constraints())
+    return _form_analysis
+
+
+def ultra_analysis(validator, now=None):
+    """Analysis of ``validator``'s rules for the current (hour, weekday)."""
+    now = now or datetime.datetime.now()
+    bucket = (now.hour, now.weekday())
+    key = (bucket, validator.fingerprint())
+    analysis = _ultra_analyses.get(key)
+    if analysis is None:
+        # request threads share the dict; only one of them rebuilds it
+        with _ultra_lock:
+            analysis = _ultra_analyses.get(key)
+            if analysis is None:
+                # a new hour makes every older analysis stale
+                if any(k[0] != bucket for k in _ultra_analyses):
+                    _ultra_analyses.clear()
+                analysis = _ultra_analyses[key] = analyze(ultra_constraints(validator, now))
+    return analysis
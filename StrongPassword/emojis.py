@@ -0,0 +1,152 @@
+"""Grapheme-aware emoji detection.
+
+The emoji rule used to test code points one at a time against
+``emoji.EMOJI_DATA``, which misses sequences (flags, keycaps, ZWJ families)
+and accepts fragments of them, such as a lone skin-tone modifier stuck to a
+letter. Here the password is split into grapheme clusters around emoji
+candidates and a cluster counts only if it is an emoji as a whole.
+
+The index is the set of emoji sequences with U+FE0F removed (so fully, minimally
+and unqualified forms are the same entry), without the bare components
+(skin tones, hair styles). It ships prebuilt in data/emoji.bin and is only read
+the first time a password is checked, so importing the validators no longer
+pulls in the ``emoji`` package. When the installed package is newer than the
+file, the index is rebuilt from it (regenerate with `manage.py build_emoji_index`).
+"""
+import json
+import unicodedata
+import zlib
+from pathlib import Path
+
+from .charclass import EMOJI, EMOJI_START, TranslateTable, _emoji_version, flags_of
+
+DATA_FILE = Path(__file__).resolve().parent / "data" / "emoji.bin"
+
+ZWJ = '\u200d'
+VS15 = '\ufe0e'    # text presentation
+VS16 = '\ufe0f'    # emoji presentation
+
+_CANDIDATE = EMOJI | EMOJI_START
+_COMPONENT = 1      # emoji.STATUS['component']
+# '1' for characters that can start an emoji, so str.find() skips the rest
+_MARKS = TranslateTable(lambda flags: '1' if flags & _CANDIDATE else '0')
+
+_index = None
+
+
+def build():
+    """Return the sorted index entries from the installed ``emoji`` package."""
+    import emoji
+    return sorted({
+        key.replace(VS16, '')
+        for key, data in emoji.EMOJI_DATA.items()
+        if data.get('status') != _COMPONENT
+    })
+
+
+def save(path=DATA_FILE):
+    entries = build()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = {"emoji": _emoji_version(), "entries": len(entries)}
+    with open(path, "wb") as fh:
+        fh.write(json.dumps(header).encode() + b"\n")
+        fh.write(zlib.compress('\n'.join(entries).encode('utf-8'), 9))
+    return header
+
+
+def load(path=DATA_FILE):
+    """Read the prebuilt index, or return None if it is missing or stale."""
+    try:
+        with open(path, "rb") as fh:
+            header = json.loads(fh.readline())
+            entries = zlib.decompress(fh.read()).decode('utf-8').split('\n')
+    except (OSError, ValueError, zlib.error):
+        return None
+    installed = _emoji_version()
+    if installed is not None and header.get("emoji") != installed:
+        return None
+    return frozenset(entries)
+
+
+def index():
+    global _index
+    if _index is None:
+        _index = load() or frozenset(build())
+    return _index
+
+
+def _is_regional_indicator(c):
+    return '\U0001F1E6' <= c <= '\U0001F1FF'
+
+
+def _is_extend(c):
+    # the grapheme "Extend" characters that matter for emoji: variation
+    # selectors, skin tones, tag characters (subdivision flags) and marks
+    # such as the keycap U+20E3
+    if c in (VS15, VS16) or '\U0001F3FB' <= c <= '\U0001F3FF' or '\U000E0020' <= c <= '\U000E007F':
+        return True
+    return unicodedata.category(c) in ('Mn', 'Me', 'Mc')
+
+
+def _cluster_end(value, i):
+    """End of the grapheme cluster that starts at ``value[i]``."""
+    n = len(value)
+    if _is_regional_indicator(value[i]):
+        return i + 2 if i + 1 < n and _is_regional_indicator(value[i + 1]) else i + 1
+    j = i + 1
+    while j < n:
+        c = value[j]
+        if c == ZWJ:
+            j += 1
+            # a pictograph after a joiner belongs to the same cluster
+            if j < n and flags_of(value[j]) & _CANDIDATE and not _is_regional_indicator(value[j]):
+                j += 1
+        elif _is_extend(c):
+            j += 1
+        else:
+            break
+    return j
+
+
+def _is_emoji(cluster, entries):
+    if VS15 in cluster:
+        return False
+    cluster = cluster.replace(VS16, '')
+    if cluster in entries:
+        return True
+    parts = cluster.split(ZWJ)
+    if len(parts) == 1:
+        return False
+    # ZWJ sequences outside the recommended set still render as emoji
+    if all(part in entries for part in parts):
+        return True
+    # a stray or trailing joiner, or a part the index does not know: the
+    # longest leading sequence that is an emoji still renders as one
+    return any(ZWJ.join(parts[:k]) in entries for k in range(len(parts) - 1, 0, -1))
+
+
+def iter_emoji(value):
+    """Yield ``(start, cluster)`` for every emoji grapheme cluster in ``value``."""
+    marks = value.translate(_MARKS)
+    i = marks.find('1')
+    if i < 0:
+        return
+    entries = index()
+    while i >= 0:
+        j = _cluster_end(value, i)
+        if _is_emoji(value[i:j], entries):
+            yield i, value[i:j]
+        else:
+            # a joined sequence that is no emoji can still hold one after its
+            # first part ('1\u200d😀'), so scan on from the first joiner
+            k = value.find(ZWJ, i, j)
+            if k >= 0:
+                j = k + 1
+        i = marks.find('1', j)
+
+
+def contains_emoji(value):
+    for _ in iter_emoji(value):
+        return True
+    return False
@@ -1,8 +1,5 @@
 from django import forms
-import emoji
-import datetime
-import re
-from collections import Counter
+from .rules import check_password
 
 class StrongPassword(forms.Form):
     password = forms.CharField(widget=forms.TextInput(attrs={
@@ -13,196 +10,6 @@ class StrongPassword(forms.Form):
 
     def clean_password(self):
         value = (self.cleaned_data.get('password') or "")
-        now = datetime.datetime.now()
-        val = value.lower()
-
-        # helpers/constants
-        SPECIALS = set("!@#$%^&*()-_+=[]{};:,.<>?/|\\~")
-        VALID_DART_SCORES = {"180","60","100","120","140","150","170"}
-        musical_notes = set("♪♫♬")
-        greek_letters = set("αβγδεζηθλμνξοπρστυφχψω")
-
-        # safety: avoid index errors
-        if not value:
-            raise forms.ValidationError("❌ Password is required.")
-
-        # 1. Basic structural checks (do these first so later index access is safe)
-        if len(value) < 8:
-            raise forms.ValidationError("❌ Password is too short. Try at least 8 characters.")
-
-        if ' ' in value:
-            raise forms.ValidationError("⛔ No spaces allowed in the password.")
-
-        # Start must be a special char; end must be either a special char OR a digit.
-        # (resolves earlier contradiction between "end special" vs "end digit")
-        if value[0] not in SPECIALS:
-            raise forms.ValidationError("❌ Password must start with a special character.")
-        if not (value[-1] in SPECIALS or value[-1].isdigit()):
-            raise forms.ValidationError("🔚 Password must end with a special character or a digit.")
-
-        # 2. Character type presence
-        if not any(c.isupper() for c in value):
-            raise forms.ValidationError("❌ Needs at least one uppercase letter.")
-
-        if not any(c in SPECIALS for c in value):
-            raise forms.ValidationError("❌ Include at least one special character (!@#...).")
-
-        # digits: at least 3 digits AND digits must not repeat (you had both rules)
-        digit_chars = [c for c in value if c.isdigit()]
-        if len(digit_chars) < 3:
-            raise forms.ValidationError("❌ Include at least 3 numbers.")
-        if len(digit_chars) != len(set(digit_chars)):
-            raise forms.ValidationError("🔂 No digit should repeat.")
-
-        # sum of digits must be prime (keeps your rule)
-        digits_as_ints = [int(c) for c in digit_chars]
-        def is_prime(n):
-            if n < 2: return False
-            for i in range(2, int(n**0.5)+1):
-                if n % i == 0:
-                    return False
-            return True
-        if not is_prime(sum(digits_as_ints)):
-            raise forms.ValidationError(f"❌ Sum of numbers in password ({sum(digits_as_ints)}) must be a prime number.")
-
-        # vowel count
-        if sum(1 for ch in val if ch in 'aeiou') < 2:
-            raise forms.ValidationError("❌ Password must contain at least 2 vowels (a, e, i, o, u).")
-
-        # emoji presence
-        if not any(c in getattr(emoji, "EMOJI_DATA", {}) for c in value):
-            raise forms.ValidationError("😂 Must include at least one emoji.")
-
-        # palindrome substring (3+)
-        stripped = ''.join(c.lower() for c in value if c.isalnum())
-        def contains_palindrome(s):
-            n = len(s)
-            for i in range(n):
-                for j in range(i + 3, n + 1):
-                    if s[i:j] == s[i:j][::-1]:
-                        return True
-            return False
-        if not contains_palindrome(stripped):
-            raise forms.ValidationError("🔁 Password must contain a palindrome (at least 3 characters).")
-
-        # must include substring '90'
-        # if '90' not in value:
-        #     raise forms.ValidationError("🔢 Include the number '90' (ASCII of Z).")
-
-        # 3. "password" vs identical-letter rule:
-        # If "password" is present -> SKIP identical-letter check.
-        # If NOT present -> block identical consecutive letters (e.g. "aa", "BB").
-        if "password" not in val:
-            for i in range(1, len(value)):
-                if value[i].isalpha() and value[i-1].isalpha() and value[i].lower() == value[i-1].lower():
-                    raise forms.ValidationError("🚫 No identical consecutive letters allowed.")
-
-        # 4. mirrored pair requirement -> require a mirrored NON-LETTER pair
-        # (so it won't conflict with the identical-letter rule above)
-        if not any(value[i] == value[i+1] and not value[i].isalpha() for i in range(len(value)-1)):
-            raise forms.ValidationError("🪞 Include at least one mirrored non-letter pair (like '!!' or '11').")
-
-        # 5. exact uppercase count
-        uppercase_count = sum(1 for c in value if c.isupper())
-        lowercase_count = sum(1 for c in value if c.islower())
-
-        if uppercase_count < 2 or lowercase_count < 3:
-            raise forms.ValidationError("🔠 Password must contain at least 2 uppercase and 3 lowercase letters.")
-
-        # 6. at least one digit divisible by 3
-        if not any(c.isdigit() and int(c) % 3 == 0 for c in value):
-            raise forms.ValidationError("➗ Include at least one digit divisible by 3 (e.g., 3, 6, 9).")
-
-        # 7. forbid 'admin'
-        if "admin" in val:
-            raise forms.ValidationError("👮 Password must not contain the word 'admin'.")
-
-        # 8. dash required
-        if "-" not in value:
-            raise forms.ValidationError("➖ Include any dash (-).")
-
-        # 9. length multiple of 4 AND perfect square
-        if len(value) % 4 != 0:
-            raise forms.ValidationError("🔢 Password length must be a multiple of 4.")
-        if int(len(value)**0.5) ** 2 != len(value):
-            raise forms.ValidationError("📏 Password length must be a perfect square (4, 16, 36...).")
-
-        # 10. one character exactly 3 times
-        counts = Counter(value)
-        if not any(v == 3 for v in counts.values()):
-            raise forms.ValidationError("🔁 Include one character exactly 3 times.")
-
-        # 11. middle char must be a letter
-        if not value[-3].isalpha():
-            raise forms.ValidationError("💡 The third last character must be a letter.")
-
-        # 12. include at least one hex-letter (a-f)
-        # if not any(c in "abcdefABCDEF" for c in value):
-        #     raise forms.ValidationError("🔣 Include at least one hex letter (a-f).")
-
-       # Famous movies and their main/recognizable characters
-        MOVIES = {
-            "Harry Potter": ["harry", "hermione", "ron", "dumbledore", "voldemort", "snape"],
-            "Star Wars": ["luke", "leia", "vader", "yoda", "han", "chewbacca"],
-            "Lord of the Rings": ["frodo", "gandalf", "aragorn", "legolas", "gollum", "sauron"],
-            "Avengers": ["ironman", "thor", "hulk", "captainamerica", "blackwidow", "thanos"],
-            "The Matrix": ["neo", "trinity", "morpheus", "agentsmith"],
-            "Joker": ["joker", "arthur"],
-            "Inception": ["cobb", "arthur", "ariadne", "eames"],
-        }
-
-        all_characters = [c.lower() for chars in MOVIES.values() for c in chars]
-
-        if not any(char in val for char in all_characters):
-            movie_list = ", ".join(MOVIES.keys())
-            raise forms.ValidationError(
-                f"🎬 Password must include the name of a famous character from one of these movies: {movie_list}."
-            )
-
-
-        # 14. must include at least one letter from n-z
-        if not any(c in "nopqrstuvwxyz" for c in value.lower()):
-            raise forms.ValidationError("🔡 Include at least one letter from n-z.")
-
-        # 15. must include punctuation .,;:
-        if not any(c in ".,;:" for c in value):
-            raise forms.ValidationError("✍️ Include at least one punctuation mark (.,;:).")
-
-        # 16. first three characters: must be (letter, digit, symbol) unless it starts with a valid dart score
-        if not any(value.startswith(score) for score in VALID_DART_SCORES):
-            types = (
-                any(c.isalpha() for c in value[:3]),
-                any(c.isdigit() for c in value[:3]),
-                any(not c.isalnum() for c in value[:3]),
-            )
-            if sum(types) < 3:
-                raise forms.ValidationError("🎭 First three characters must include a letter, a digit, and a symbol.")
-
-        # 17. must include at least one binary digit
-        if not any(c in '01' for c in value):
-            raise forms.ValidationError("💻 Include at least one binary digit (0 or 1).")
-
-        # 18. total special characters count must be odd
-        specials = [c for c in value if not c.isalnum()]
-        if len(specials) % 2 == 0:
-            raise forms.ValidationError("🧮 Total special characters must be an odd number.")
-
-        # 19. include reversed real word (dog, stressed, evil)
-        # List of words
-        words = ['dog', 'desserts', 'evil']
-        reversed_words = [w[::-1] for w in words]  # ['god', 'stressed', 'live']
-        
-        # Validation: check if user typed the original word
-        if not any(w in val for w in words):
-            raise forms.ValidationError(
-                f"🔄 Include a real word that corresponds to a famous reversed word like {', '.join(reversed_words)}."
-            )
-
-        # 20. must include a Greek letter
-        if not any(c in greek_letters for c in value):
-            raise forms.ValidationError("🧿 Include at least one Greek letter (α-ω).")
-
-        # (I stopped adding more re-checks here for brevity — you can continue adding the remaining rules,
-        # but follow the same pattern: put index-sensitive and structural checks earlier; make dependent checks conditional.)
-
-        return value
+        # All rules live in rules.py, compiled once at import and evaluated
+        # against a single scan of the password (same order, same messages).
+        return check_password(value)
@@ -0,0 +1,163 @@
+"""Generate passwords that pass the rules, for load tests and benchmarks.
+
+The StrongPassword rules are treated as constraints and a password is
+assembled to meet them directly instead of guessed:
+
+* the length is the smallest admissible one (>= 8, multiple of 4, perfect
+  square) that fits the required pieces and the requested minimum, see
+  constraints.form_analysis();
+* the first three characters are symbol, letter, digit and the last three are
+  letter plus a mirrored special pair;
+* digits are a random unique set with a prime sum that contains a binary digit
+  and one divisible by 3;
+* one special character appears exactly 3 times and is used nowhere else, and
+  one more special is added when the non-alphanumeric count would be even;
+* word-list rules are met with a movie character and a reversed word, and the
+  rest is filled with consonants so no new words (or 'admin') appear.
+
+Every candidate is checked with rules.first_failure() before it is returned,
+so rare collisions (e.g. two equal letters ending up adjacent, or a banned
+word) are simply retried.
+
+UltraStrongPasswordValidator's rules cannot be met at any hour (for one,
+'password' needs vowels), so for it the generator only reports the conflict
+(Unsatisfiable), or that it has no construction for the rules should they
+ever change (NoGenerator).
+"""
+import datetime
+import random
+
+from . import wordlists
+from .constraints import form_analysis, ultra_analysis
+from .rules import GREEK_LETTERS, SPECIALS, first_failure, is_prime
+
+
+class Unsatisfiable(Exception):
+    """No password can be generated for the rules right now; ``str(e)`` says why."""
+
+
+class NoGenerator(Exception):
+    """The rules can be met, but there is no construction for them."""
+
+
+# lower-case fillers have no vowels so they cannot spell words from the lists,
+# upper-case ones never equal a lower-case filler ignoring case
+_LOWER_FILLER = 'bcfghjkpqrtvwxz'
+_UPPER_FILLER = 'DLMNSY'
+_EMOJI = ('😀', '🔥', '🚀', '🎉', '🍕', '🐙')
+# specials that are not also the required dash or punctuation mark
+_SPECIALS = sorted(SPECIALS - set('-.,;:'))
+_GREEK = sorted(GREEK_LETTERS)
+
+
+def _no_double_letters(word):
+    return not any(a == b for a, b in zip(word, word[1:]))
+
+
+# 'harry', 'cobb', 'desserts', ... would break the identical-letters rule
+_MOVIE_CHARACTERS = sorted({c for chars in wordlists.MOVIES.values() for c in chars if _no_double_letters(c)})
+_REVERSED_WORDS = [w for w in wordlists.REVERSED_WORDS if _no_double_letters(w)]
+
+MAX_ATTEMPTS = 100
+
+
+def _digits_ok(digits):
+    """Whether distinct ``digits`` pass every digit rule (count, binary, multiple of 3, prime sum)."""
+    digits = set(digits)
+    return (len(digits) >= 3 and digits & set('01') and digits & set('0369')
+            and is_prime(sum(map(int, digits))))
+
+
+def _digits(rng):
+    while True:
+        digits = rng.sample('0123456789', rng.randint(3, 5))
+        if _digits_ok(digits):
+            return digits
+
+
+def _fill(rng, count):
+    # consonants with no letter repeated back to back
+    out = []
+    while len(out) < count:
+        c = rng.choice(_LOWER_FILLER)
+        if not out or out[-1] != c:
+            out.append(c)
+    return ''.join(out)
+
+
+def _candidate(rng, min_length):
+    digits = _digits(rng)
+    triple, mirrored, lead, extra = rng.sample(_SPECIALS, 4)
+    pal_outer, pal_inner, head, tail = rng.sample(_LOWER_FILLER, 4)
+
+    prefix = lead + head + digits[0]
+    suffix = tail + mirrored + mirrored
+    tokens = [
+        rng.choice(_MOVIE_CHARACTERS),
+        rng.choice(_REVERSED_WORDS),
+        rng.choice(_GREEK),
+        pal_outer + pal_inner + pal_outer,
+        *rng.sample(_UPPER_FILLER, 2),
+        rng.choice(_EMOJI),
+        '-',
+        rng.choice('.,;:'),
+        triple, triple, triple,
+        *digits[1:],
+    ]
+    body = ''.join(tokens)
+    nonalnum = sum(1 for c in prefix + body + suffix if not c.isalnum())
+    if nonalnum % 2 == 0:
+        tokens.append(extra)
+
+    size = len(prefix) + len(suffix) + sum(map(len, tokens))
+    length = next(n for n in form_analysis().lengths if n >= max(size, min_length))
+    if length > size:
+        tokens.append(_fill(rng, length - size))
+    rng.shuffle(tokens)
+    return prefix + ''.join(tokens) + suffix
+
+
+def generate_strong(rng=None, min_length=0):
+    """Return one password that passes ``StrongPassword.clean_password``.
+
+    The password is padded to at least ``min_length`` characters.
+    """
+    analysis = form_analysis()
+    if not analysis.satisfiable:
+        raise Unsatisfiable(analysis.message)
+    if min_length > analysis.lengths[-1]:
+        raise ValueError(f"Passwords are generated up to {analysis.lengths[-1]} characters.")
+    rng = rng or random.Random()
+    for _ in range(MAX_ATTEMPTS):
+        password = _candidate(rng, min_length)
+        if first_failure(password) is None:
+            return password
+    raise Unsatisfiable(
+        f"No valid password found in {MAX_ATTEMPTS} attempts; "
+        "check STRONG_PASSWORD_BANNED_WORDS_FILE for very broad entries."
+    )
+
+
+def generate_ultra(validator, now=None):
+    """Explain why no password is generated for ``validator`` at ``now``.
+
+    Raises Unsatisfiable with the conflict the analysis found, or NoGenerator
+    when it finds none.
+    """
+    now = now or datetime.datetime.now()
+    analysis = ultra_analysis(validator, now)
+    if not analysis.satisfiable:
+        raise Unsatisfiable(analysis.message)
+    # the analysis always finds no_vowels + password_word, so this is only
+    # reachable after the rules themselves change
+    raise NoGenerator(
+        f"The UltraStrongPasswordValidator rules show no conflict at {now:%H}:00 on {now:%A}, "
+        "but there is no generator for them yet; only the StrongPassword form rules are supported."
+    )
+
+
+def generate_many(count, seed=None):
+    """Yield ``count`` passwords that pass the StrongPassword rules."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield generate_strong(rng)
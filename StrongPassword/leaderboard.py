@@ -0,0 +1,155 @@
+"""In-memory leaderboard for success.html: fewest tries and fastest time.
+
+Each board is a Fenwick tree (binary indexed tree) over score buckets, one
+bucket per attempt count (up to MAX_ATTEMPTS) and one per second (up to
+MAX_SECONDS); larger scores share the last bucket. Every visitor who has
+solved a password counts once, with their best score. A rank is the number
+of visitors in better buckets plus one, so both updates and rank/percentile
+lookups are O(log buckets), whatever the number of finishers.
+
+The boards are built from AttemptStats.best_attempts / best_seconds with one
+GROUP BY query per board the first time they are used, updated in memory on
+every success, and rebuilt from the database every
+STRONG_PASSWORD_LEADERBOARD_REFRESH_SECONDS by the attempts writer thread
+right after it flushes, which brings in the successes other workers saw.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count
+from django.db.models.functions import Floor
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 1000
+MAX_SECONDS = 24 * 3600
+
+# rank 1 is the best; ``top_percent`` is the share of finishers at or above it
+Standing = namedtuple('Standing', 'rank total top_percent')
+
+
+class Fenwick:
+    """Prefix sums over per-bucket counts with O(log n) update and query."""
+
+    def __init__(self, counts):
+        # linear-time build from per-bucket counts
+        tree = [0] + list(counts)
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.tree = tree
+        self.total = sum(counts)
+
+    def add(self, bucket, delta=1):
+        tree = self.tree
+        i = bucket + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def prefix(self, bucket):
+        """Sum of the buckets before ``bucket``."""
+        tree = self.tree
+        total = 0
+        i = bucket
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+
+class Board:
+    def __init__(self, name, column, size, lowest):
+        self.name = name
+        self.column = column
+        self.size = size
+        # the smallest possible score, e.g. 1 attempt
+        self.lowest = lowest
+        self.tree = Fenwick([0] * size)
+
+    def bucket(self, score):
+        return min(max(int(score) - self.lowest, 0), self.size - 1)
+
+    def counts_from_db(self):
+        from .models import AttemptStats
+        counts = [0] * self.size
+        rows = (AttemptStats.objects.filter(**{f'{self.column}__isnull': False})
+                .annotate(score=Floor(self.column)).values('score').annotate(n=Count('id'))
+                .values_list('score', 'n'))
+        for score, n in rows:
+            counts[self.bucket(score)] += n
+        return counts
+
+    def move(self, old, new):
+        # a visitor's best went from ``old`` (None for a first solve) to ``new``
+        if old is None:
+            self.tree.add(self.bucket(new))
+        elif self.bucket(new) != self.bucket(old):
+            self.tree.add(self.bucket(old), -1)
+            self.tree.add(self.bucket(new))
+
+    def standing(self, score):
+        tree = self.tree
+        rank = tree.prefix(self.bucket(score)) + 1
+        total = max(tree.total, rank)
+        return Standing(rank, total, 100 * rank / total)
+
+
+BOARDS = (
+    Board('attempts', 'best_attempts', MAX_ATTEMPTS, lowest=1),
+    Board('seconds', 'best_seconds', MAX_SECONDS, lowest=0),
+)
+
+_lock = threading.Lock()
+_built_at = None
+
+
+def _refresh_seconds():
+    return getattr(settings, 'STRONG_PASSWORD_LEADERBOARD_REFRESH_SECONDS', 60)
+
+
+def _from_db():
+    return getattr(settings, 'STRONG_PASSWORD_ATTEMPTS_STORE', True)
+
+
+def rebuild():
+    """Replace the in-memory boards with the counts stored in the database."""
+    global _built_at
+    try:
+        counts = [board.counts_from_db() for board in BOARDS] if _from_db() else None
+    except DatabaseError:
+        logger.exception("Could not load the leaderboard")
+        counts = None
+    with _lock:
+        if counts is not None:
+            for board, board_counts in zip(BOARDS, counts):
+                board.tree = Fenwick(board_counts)
+        _built_at = time.monotonic()
+
+
+def _ensure_built():
+    if _built_at is None:
+        rebuild()
+
+
+def checkpoint():
+    """Rebuild from the database if the last build is older than the refresh interval."""
+    if _built_at is not None and time.monotonic() - _built_at >= _refresh_seconds():
+        rebuild()
+
+
+def submit(progress):
+    """Record a solve (an attempts.Progress) and return ``{board name: Standing}`` for it."""
+    _ensure_built()
+    before, after = progress.previous, progress.run
+    scores = {'attempts': progress.attempts, 'seconds': progress.seconds}
+    with _lock:
+        BOARDS[0].move(before.best_attempts, after.best_attempts)
+        BOARDS[1].move(before.best_seconds, after.best_seconds)
+        return {board.name: board.standing(scores[board.name]) for board in BOARDS}
@@ -0,0 +1,340 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+
+from . import wordlists
+from .breached import is_breached
+from .charclass import VOWEL, VOWELS, flags_of
+from .emojis import contains_emoji
+from .palindromes import describe_longest
+from .rules import (
+    ALNUM, ALPHA, BINARY, DECIMAL, DIGIT, EMOJI, EMOJI_START, GREEK, LOWER, NZ, PUNCT, RULES, SPECIAL,
+    STRUCTURAL_RULES, UPPER, VALID_DART_SCORES, is_prime,
+)
+
+# Live validation of the StrongPassword rules while the user types.
+#
+# The client sends edits ({"op": "insert", "pos", "text"}, {"op": "delete",
+# "pos", "count"} or {"op": "reset", "text"}) over a WebSocket. LiveState keeps
+# every aggregate the rules need (class counts, digit multiset and sum, the
+# character Counter and how many characters occur exactly 3 times, adjacent
+# pair counts, palindromic 3/4-windows and word-list hits) and updates them
+# from the edited characters plus a few characters of context on each side,
+# instead of rescanning the whole password. Only rules whose status changed
+# are pushed back. A frame holding a list of edits is applied all or nothing,
+# and the rules see the value stripped like the form's CharField does.
+
+_TRACKED = (UPPER, LOWER, SPECIAL, EMOJI, EMOJI_START, GREEK, NZ, PUNCT, BINARY)
+_WORD_CONTEXT = max(wordlists.WORDS.longest - 1, 1)
+_PALINDROME_CONTEXT = 3   # palindromic windows are 3 or 4 characters long
+
+
+def _vowel_count(c):
+    return sum(1 for x in c.lower() if x in VOWELS)
+
+
+def classify(c):
+    """Return ``(flags, lowered, vowel_count)`` for the character ``c``."""
+    flags = flags_of(c)
+    return flags, c.lower(), _vowel_count(c) if flags & VOWEL else 0
+
+
+def _pairs(chars, lows, flags):
+    double = mirrored = 0
+    for i in range(1, len(chars)):
+        if flags[i] & flags[i - 1] & ALPHA:
+            if lows[i] == lows[i - 1]:
+                double += 1
+        elif chars[i] == chars[i - 1] and not flags[i] & ALPHA:
+            mirrored += 1
+    return double, mirrored
+
+
+def _palindromic_windows(lows, flags):
+    s = ''.join(low for low, fl in zip(lows, flags) if fl & ALNUM)
+    count = sum(1 for a, b in zip(s, s[2:]) if a == b)
+    count += sum(1 for a, b, c, d in zip(s, s[1:], s[2:], s[3:]) if a == d and b == c)
+    return count
+
+
+def _word_hits(lows):
+    return Counter(group for _, _, group in wordlists.WORDS.matches(''.join(lows)))
+
+
+class LiveState:
+    def __init__(self, text=''):
+        self.chars = []
+        self.lows = []
+        self.flags = []
+        self.counts = Counter()
+        self.count_of_counts = Counter()
+        self.class_counts = Counter()
+        self.nonalnum = self.vowels = 0
+        self.digit_count = self.digit_sum = self.bad_digits = 0
+        self.repeated_digits = self.div3_digits = 0
+        self.double_letters = self.mirrored_pairs = self.palindromes = 0
+        self.hits = Counter()
+        if text:
+            self.insert(0, text)
+
+    @property
+    def value(self):
+        return ''.join(self.chars)
+
+    @property
+    def longest_palindrome(self):
+        # for the palindrome rule's message
+        return describe_longest(self.value)
+
+    def stripped(self):
+        """The state of the value the form validates: CharField strips surrounding whitespace."""
+        chars = self.chars
+        if chars and (chars[0].isspace() or chars[-1].isspace()):
+            return LiveState(self.value.strip())
+        return self
+
+    # --- editing
+
+    def insert(self, pos, text):
+        self._replace(pos, 0, text)
+
+    def delete(self, pos, count=1):
+        self._replace(pos, count, '')
+
+    def _context(self, pos, end):
+        # walk outwards until both the palindrome (alnum units) and the
+        # word-list (any units) windows have enough context on each side
+        lows, flags = self.lows, self.flags
+        lo, alnum, units = pos, 0, 0
+        while lo > 0 and (alnum < _PALINDROME_CONTEXT or units < _WORD_CONTEXT):
+            lo -= 1
+            units += len(lows[lo])
+            if flags[lo] & ALNUM:
+                alnum += len(lows[lo])
+        hi, alnum, units = end, 0, 0
+        while hi < len(lows) and (alnum < _PALINDROME_CONTEXT or units < _WORD_CONTEXT):
+            units += len(lows[hi])
+            if flags[hi] & ALNUM:
+                alnum += len(lows[hi])
+            hi += 1
+        return lo, hi
+
+    def _local(self, chars, lows, flags):
+        double, mirrored = _pairs(chars, lows, flags)
+        return double, mirrored, _palindromic_windows(lows, flags), _word_hits(lows)
+
+    def _replace(self, pos, count, text):
+        _check_range(pos, count, len(self.chars))
+        end = min(pos + count, len(self.chars))
+        lo, hi = self._context(pos, end)
+
+        new = [classify(c) for c in text]
+        new_chars = list(text)
+        new_lows = [entry[1] for entry in new]
+        new_flags = [entry[0] for entry in new]
+
+        before = self._local(self.chars[lo:hi], self.lows[lo:hi], self.flags[lo:hi])
+        after = self._local(
+            self.chars[lo:pos] + new_chars + self.chars[end:hi],
+            self.lows[lo:pos] + new_lows + self.lows[end:hi],
+            self.flags[lo:pos] + new_flags + self.flags[end:hi],
+        )
+        self.double_letters += after[0] - before[0]
+        self.mirrored_pairs += after[1] - before[1]
+        self.palindromes += after[2] - before[2]
+        self.hits.update(after[3])
+        self.hits.subtract(before[3])
+
+        for c in self.chars[pos:end]:
+            self._count(c, -1)
+        for c in new_chars:
+            self._count(c, 1)
+
+        self.chars[pos:end] = new_chars
+        self.lows[pos:end] = new_lows
+        self.flags[pos:end] = new_flags
+
+    def _count(self, c, delta):
+        flags, low, nvow = classify(c)
+        n = self.counts[c]
+        self.count_of_counts[n] -= 1
+        self.count_of_counts[n + delta] += 1
+        if n + delta:
+            self.counts[c] = n + delta
+        else:
+            del self.counts[c]
+        for bit in _TRACKED:
+            if flags & bit:
+                self.class_counts[bit] += delta
+        if not flags & ALNUM:
+            self.nonalnum += delta
+        self.vowels += nvow * delta
+        if flags & DIGIT:
+            self.digit_count += delta
+            if not flags & DECIMAL:
+                # '²' and friends, see rules.Features
+                self.bad_digits += delta
+            else:
+                value = int(c)
+                self.digit_sum += value * delta
+                if value % 3 == 0:
+                    self.div3_digits += delta
+            # a digit becomes repeated going 1 -> 2 and stops being at 2 -> 1
+            if (n, n + delta) in ((1, 2), (2, 1)):
+                self.repeated_digits += delta
+
+    # --- rule status
+
+    def _has(self, bit):
+        return self.class_counts[bit] > 0
+
+    def _has_emoji(self):
+        # grapheme clusters are not local to an edit (a flag pair depends on
+        # every regional indicator before it), so sequences are rescanned,
+        # but only while a character that can start an emoji is present
+        if not self._has(EMOJI) and not self._has(EMOJI_START):
+            return False
+        return contains_emoji(self.value)
+
+    def statuses(self):
+        """Return ``{rule: ok}`` for every StrongPassword rule."""
+        chars, flags = self.chars, self.flags
+        n = len(chars)
+        first_three = flags[:3]
+        return {
+            'too_short': n >= 8,
+            'no_spaces': not self.counts[' '],
+            'start_special': n > 0 and bool(flags[0] & SPECIAL),
+            'end_special_or_digit': n > 0 and bool(flags[-1] & (SPECIAL | DIGIT)),
+            'uppercase': self._has(UPPER),
+            'special': self._has(SPECIAL),
+            'three_digits': self.digit_count >= 3,
+            'unique_digits': not self.repeated_digits,
+            'prime_digit_sum': not self.bad_digits and is_prime(self.digit_sum),
+            'two_vowels': self.vowels >= 2,
+            'emoji': self._has_emoji(),
+            'palindrome': self.palindromes > 0,
+            'identical_letters': self.hits[wordlists.PASSWORD] > 0 or not self.double_letters,
+            'mirrored_pair': self.mirrored_pairs > 0,
+            'upper_lower_counts': self.class_counts[UPPER] >= 2 and self.class_counts[LOWER] >= 3,
+            'digit_div_3': self.div3_digits > 0,
+            'no_admin': not self.hits[wordlists.ADMIN],
+            'dash': self.counts['-'] > 0,
+            'length_multiple_of_4': n % 4 == 0,
+            'length_square': int(n**0.5) ** 2 == n,
+            'char_three_times': self.count_of_counts[3] > 0,
+            'third_last_letter': n >= 3 and bool(flags[-3] & ALPHA),
+            'movie_character': self.hits[wordlists.MOVIE_CHARACTER] > 0,
+            'letter_n_to_z': self._has(NZ),
+            'punctuation': self._has(PUNCT),
+            'first_three': ''.join(chars[:3]).startswith(VALID_DART_SCORES) or (
+                any(fl & ALPHA for fl in first_three)
+                and any(fl & DIGIT for fl in first_three)
+                and any(not fl & ALNUM for fl in first_three)),
+            'binary_digit': self._has(BINARY),
+            'odd_specials': self.nonalnum % 2 == 1,
+            'reversed_word': self.hits[wordlists.REVERSED_WORD] > 0,
+            'greek_letter': self._has(GREEK),
+            'banned_word': not self.hits[wordlists.BANNED],
+            'common_password': not is_breached(self.value),
+        }
+
+    def first_error(self, statuses):
+        """The message clean_password would show, or None when every rule passes."""
+        if not self.chars:
+            return "❌ Password is required."
+        for rule in STRUCTURAL_RULES + RULES:
+            if not statuses[rule.name]:
+                return rule.message.format(f=self)
+        return None
+
+
+MESSAGES = {rule.name: rule.message for rule in STRUCTURAL_RULES + RULES}
+
+
+def _check_range(pos, count, length):
+    # bad edits are rejected, not clamped, so the counts stay in sync with
+    # the client (the websocket reports them as invalid_edit)
+    if not 0 <= pos <= length:
+        raise ValueError(f"Position {pos} is outside the password (0-{length}).")
+    if count < 0:
+        raise ValueError(f"Cannot delete {count} characters.")
+
+
+def _parse_edit(edit, length):
+    """``(op, args, length after the edit)`` for ``edit`` on a value of ``length`` characters."""
+    if not isinstance(edit, dict):
+        raise ValueError("Each edit must be a JSON object.")
+    op = edit.get('op')
+    if op == 'insert':
+        pos, text = int(edit['pos']), str(edit['text'])
+        _check_range(pos, 0, length)
+        return op, (pos, text), length + len(text)
+    if op == 'delete':
+        pos, count = int(edit['pos']), int(edit.get('count', 1))
+        _check_range(pos, count, length)
+        return op, (pos, count), length - min(count, length - pos)
+    if op == 'reset':
+        text = str(edit.get('text', ''))
+        return op, (text,), len(text)
+    raise ValueError(f"Unknown op: {op!r}")
+
+
+def apply_edits(state, edits):
+    """Apply ``edits`` in order, all or none: every edit is checked before the first is applied."""
+    length = len(state.chars)
+    parsed = []
+    for edit in edits:
+        op, args, length = _parse_edit(edit, length)
+        parsed.append((op, args))
+    for op, args in parsed:
+        if op == 'reset':
+            state.__init__(*args)
+        else:
+            getattr(state, op)(*args)
+
+
+def apply_edit(state, edit):
+    apply_edits(state, [edit])
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI app for ws/validate/: push rule status changes for each edit."""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    await send({'type': 'websocket.accept'})
+
+    max_length = settings.STRONG_PASSWORD_LIVE_MAX_LENGTH
+    state = LiveState()
+    previous = {}
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        if message['type'] != 'websocket.receive':
+            continue
+        try:
+            edits = json.loads(message.get('text') or '[]')
+            apply_edits(state, edits if isinstance(edits, list) else [edits])
+        except (ValueError, KeyError, TypeError) as e:
+            await send({'type': 'websocket.send', 'text': json.dumps({'invalid_edit': str(e)})})
+            continue
+        if len(state.chars) > max_length:
+            await send({'type': 'websocket.close', 'code': 1009})
+            return
+
+        checked = state.stripped()
+        statuses = checked.statuses()
+        changed = {
+            name: {'ok': ok, 'message': None if ok else MESSAGES[name].format(f=checked)}
+            for name, ok in statuses.items() if previous.get(name) != ok
+        }
+        previous = statuses
+        error = checked.first_error(statuses)
+        await send({'type': 'websocket.send', 'text': json.dumps({
+            'changed': changed,
+            'valid': error is None,
+            'error': error,
+        })})
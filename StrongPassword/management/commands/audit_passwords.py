@@ -0,0 +1,53 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from StrongPassword.audit import VALID, audit_range, chunk_ranges
+from StrongPassword.batch import init_worker
+
+
+class Command(BaseCommand):
+    help = "Audit a newline-delimited password file against the StrongPassword rules."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Password file, one password per line.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=8 << 20,
+                            help="Bytes per work unit (default 8 MiB).")
+        parser.add_argument('--failures', metavar='PATH',
+                            help="Write 'line<TAB>rule' for every rejected line to PATH.")
+
+    def handle(self, path, workers, chunk_size, failures, **options):
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+
+        ranges = chunk_ranges(path, chunk_size)
+        histogram = Counter()
+        line_base = 0
+        report = open(failures, 'w', encoding='utf-8') if failures else None
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+                results = pool.map(
+                    audit_range,
+                    [path] * len(ranges),
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges],
+                    [report is not None] * len(ranges),
+                )
+                for line_count, chunk_histogram, chunk_failures in results:
+                    histogram.update(chunk_histogram)
+                    if report:
+                        report.writelines(f"{line_base + i + 1}\t{code}\n" for i, code in chunk_failures)
+                    line_base += line_count
+        finally:
+            if report:
+                report.close()
+
+        total = sum(histogram.values())
+        self.stdout.write(f"{total} passwords audited, {histogram[VALID]} valid.")
+        for code, count in histogram.most_common():
+            if code == VALID:
+                continue
+            self.stdout.write(f"{code:<24} {count:>12} {count / total:8.2%}")
@@ -0,0 +1,42 @@
+import gzip
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from StrongPassword import breached
+
+
+def _open(path):
+    if path == '-':
+        return sys.stdin
+    opener = gzip.open if path.endswith('.gz') else open
+    # a few lines in big dumps are not UTF-8; they can never match form input anyway
+    return opener(path, 'rt', encoding='utf-8', errors='replace')
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped filter of common or breached passwords from a text list."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Password list, one per line; .gz is read as gzip, '-' is stdin.")
+        parser.add_argument('--output', default=str(breached.DATA_FILE),
+                            help="Where to write the filter (default: the shipped data file).")
+        parser.add_argument('--bits', type=int, choices=(8, 16, 32), default=16,
+                            help="Fingerprint bits; false positive rate is 2**-bits (default 16).")
+        parser.add_argument('--lowercase', action='store_true',
+                            help="Store and look up passwords lower-cased, like Django's list.")
+
+    def handle(self, source, output, bits, lowercase, **options):
+        if source != '-' and not os.path.isfile(source):
+            raise CommandError(f"No such file: {source}")
+        with _open(source) as fh:
+            try:
+                header = breached.build(fh, output, bits=bits, lowercase=lowercase,
+                                        source=os.path.basename(source))
+            except ValueError as e:
+                raise CommandError(str(e))
+        size = header['offset'] + 3 * header['segment'] * bits // 8
+        self.stdout.write(
+            f"Wrote {output}: {header['entries']} distinct passwords, {size:,} bytes."
+        )
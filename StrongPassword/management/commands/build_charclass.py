@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from StrongPassword import charclass
+
+
+class Command(BaseCommand):
+    help = "Build the code-point classification table for this interpreter's Unicode version."
+    # the URL checks import the rules, which need the table
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(charclass.DATA_FILE),
+                            help="Where to write the table (default: data/charclass-<unicode>.bin).")
+
+    def handle(self, output, **options):
+        header = charclass.save(output)
+        self.stdout.write(
+            f"Wrote {output}: Unicode {header['unicode']}, emoji {header['emoji']}, "
+            f"{header['blocks']} distinct blocks."
+        )
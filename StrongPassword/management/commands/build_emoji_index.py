@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from StrongPassword import emojis
+
+
+class Command(BaseCommand):
+    help = "Rebuild the prebuilt emoji sequence index (data/emoji.bin) from the emoji package."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(emojis.DATA_FILE),
+                            help="Where to write the index (default: the shipped data file).")
+
+    def handle(self, output, **options):
+        header = emojis.save(output)
+        self.stdout.write(f"Wrote {output}: emoji {header['emoji']}, {header['entries']} sequences.")
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from StrongPassword.generator import NoGenerator, Unsatisfiable, generate_many, generate_ultra
+from StrongPassword.validators import UltraStrongPasswordValidator
+
+
+class Command(BaseCommand):
+    help = "Print passwords that pass the current rules, one per line (for load tests)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, nargs='?', default=1)
+        parser.add_argument('--validator', choices=('strong', 'ultra'), default='strong',
+                            help="Rule set to satisfy (default: the StrongPassword form).")
+        parser.add_argument('--maiden-letter', default='a',
+                            help="mothers_maiden_letter of the ultra validator.")
+        parser.add_argument('--seed', type=int, help="Seed for reproducible output.")
+        parser.add_argument('--output', metavar='PATH', help="Write to PATH instead of stdout.")
+
+    def handle(self, count, validator, maiden_letter, seed, output, **options):
+        try:
+            if validator == 'ultra':
+                generate_ultra(UltraStrongPasswordValidator(maiden_letter))
+            out = open(output, 'w', encoding='utf-8') if output else sys.stdout
+            try:
+                out.writelines(f"{password}\n" for password in generate_many(count, seed))
+            finally:
+                if output:
+                    out.close()
+        except (NoGenerator, Unsatisfiable) as e:
+            raise CommandError(str(e))
@@ -0,0 +1,97 @@
+"""Aho–Corasick dictionary matching for the word-list rules.
+
+All word lists (movie characters, spaceships, spices, banned words, ...) go
+into one automaton, each word tagged with the groups it belongs to. A single
+pass over the lower-cased password then reports every hit of every group, so
+the cost is O(len(password) + hits) no matter how many words are loaded.
+"""
+
+
+class Automaton:
+    def __init__(self, groups=None):
+        # trie as parallel lists: goto[state] maps a char to the next state
+        self._goto = [{}]
+        self._fail = [0]
+        # the words ending exactly at each state; _out adds those of its
+        # failure chain, and is recomputed from this on every build()
+        self._own = [()]
+        self._out = [()]
+        self._built = False
+        self.longest = 0
+        for group, words in (groups or {}).items():
+            self.add_words(group, words)
+
+    def add(self, word, group):
+        word = word.lower()
+        if not word:
+            return
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append(())
+                self._out.append(())
+            state = nxt
+        self.longest = max(self.longest, len(word))
+        if (word, group) not in self._own[state]:
+            self._own[state] += ((word, group),)
+        self._built = False
+
+    def add_words(self, group, words):
+        for word in words:
+            self.add(word, group)
+
+    def add_file(self, group, path):
+        """Load one word per line from ``path``; blank lines and ``#`` comments are skipped."""
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                word = line.split('#', 1)[0].strip()
+                if word:
+                    self.add(word, group)
+
+    def build(self):
+        goto, fail = self._goto, self._fail
+        out = self._out = list(self._own)
+        queue = list(goto[0].values())
+        for state in queue:
+            fail[state] = 0
+        # breadth-first, so every failure target is final before it is used
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._built = True
+        return self
+
+    def matches(self, text):
+        """Yield ``(start, word, group)`` for every dictionary hit in ``text``.
+
+        ``text`` must already be lower-cased.
+        """
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0) if state else root.get(ch, 0)
+            if out[state]:
+                for word, group in out[state]:
+                    yield i - len(word) + 1, word, group
+
+    def search(self, text):
+        """Return ``{group: [(start, word), ...]}`` for all hits in ``text``."""
+        hits = {}
+        for start, word, group in self.matches(text):
+            hits.setdefault(group, []).append((start, word))
+        return hits
@@ -0,0 +1,239 @@
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' files are not pruned
+    fcntl = None
+
+# Per-rule counters: evaluations, rejections and cumulative nanoseconds.
+#
+# Off by default (STRONG_PASSWORD_METRICS). The validators check ``enabled``
+# once per call and only take the timed code path when it is set, so there is
+# no per-rule cost while collection is off.
+#
+# With STRONG_PASSWORD_METRICS_DIR set, every process keeps its counters in
+# its own memory-mapped file in that directory and render() sums all files,
+# so /metrics reports totals across workers (including ones that exited).
+# When summing, the files of exited processes are folded into one
+# rules-<layout>-exited.bin and removed, so the directory does not grow with
+# every worker restart. Without a directory the counters are process-local.
+#
+# The result cache's hits and misses (cache.py) are kept the same way, after
+# the per-rule counters.
+
+enabled = getattr(settings, 'STRONG_PASSWORD_METRICS', False)
+
+FIELDS = ('evaluations', 'rejections', 'nanoseconds')
+CACHE_FIELDS = ('hits', 'misses')
+
+_lock = threading.Lock()
+# guards the read-modify-write increments below; replaced after a fork
+_record_lock = threading.Lock()
+_keys = None
+_index = None
+_cache_slot = None
+_counters = None
+_pid = None
+
+
+def _layout():
+    # Built from the rule tables so every process agrees on slot order.
+    global _keys, _index, _cache_slot
+    if _keys is None:
+        from .rules import RULES, STRUCTURAL_RULES
+        from .validators import RULE_CODES
+        keys = [('strong', r.name) for r in STRUCTURAL_RULES]
+        keys.append(('strong', 'scan'))
+        keys += [('strong', r.name) for r in RULES]
+        keys.append(('ultra', 'scan'))
+        keys += [('ultra', code) for code in RULE_CODES]
+        _keys = keys
+        _index = {key: i * len(FIELDS) for i, key in enumerate(keys)}
+        _cache_slot = len(keys) * len(FIELDS)
+    return _keys
+
+
+def _layout_tag():
+    text = '\n'.join(f'{v}:{r}' for v, r in _layout())
+    text += '\n' + '\n'.join(f'cache:{field}' for field in CACHE_FIELDS)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def _metrics_dir():
+    return getattr(settings, 'STRONG_PASSWORD_METRICS_DIR', None)
+
+
+def _open_counters():
+    size = (len(_layout()) * len(FIELDS) + len(CACHE_FIELDS)) * 8
+    directory = _metrics_dir()
+    if not directory:
+        return memoryview(bytearray(size)).cast('Q')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'rules-{_layout_tag()}-{os.getpid()}.bin')
+    with open(path, 'a+b') as fh:
+        fh.truncate(size)
+        mm = mmap.mmap(fh.fileno(), size)
+    return memoryview(mm).cast('Q')
+
+
+def _counters_for_process():
+    global _counters, _pid, _record_lock
+    # a forked worker must not keep writing into its parent's file (nor wait on
+    # a lock some other parent thread held at fork time)
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                _record_lock = threading.Lock()
+                _counters = _open_counters()
+                _pid = os.getpid()
+    return _counters
+
+
+def record(validator, rule, rejected, nanoseconds):
+    counters = _counters_for_process()
+    i = _index.get((validator, rule))
+    if i is None:
+        return
+    # += on the mmap is not atomic, threaded workers would lose increments
+    with _record_lock:
+        counters[i] += 1
+        if rejected:
+            counters[i + 1] += 1
+        counters[i + 2] += nanoseconds
+
+
+def record_cache(hit):
+    counters = _counters_for_process()
+    with _record_lock:
+        counters[_cache_slot + (0 if hit else 1)] += 1
+
+
+def timed(validator, results):
+    """Wrap an evaluate() generator, timing the work behind each yielded rule."""
+    clock = time.perf_counter_ns
+    start = clock()
+    for code, ok, message in results:
+        end = clock()
+        record(validator, code, not ok, end - start)
+        yield code, ok, message
+        start = clock()
+
+
+_COUNTER_FILE = re.compile(r'rules-([0-9a-f]+)-(\d+)\.bin')
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _add(totals, path):
+    with open(path, 'rb') as fh:
+        data = memoryview(fh.read()).cast('Q')
+    for i in range(min(len(data), len(totals))):
+        totals[i] += data[i]
+
+
+def _prune(directory, tag, exited, size):
+    # fold the counters of exited processes into ``exited`` (an open file the
+    # caller holds an exclusive lock on) and delete them; files from an older
+    # rule layout cannot be folded and are just deleted
+    folded = [0] * size
+    stale = []
+    for name in os.listdir(directory):
+        match = _COUNTER_FILE.fullmatch(name)
+        if not match or _alive(int(match[2])):
+            continue
+        path = os.path.join(directory, name)
+        if match[1] == tag:
+            _add(folded, path)
+        stale.append(path)
+    if not stale:
+        return
+    _add(folded, exited.name)
+    exited.truncate(0)
+    exited.write(array('Q', folded).tobytes())
+    exited.flush()
+    for path in stale:
+        os.remove(path)
+
+
+def _totals():
+    keys = _layout()
+    totals = [0] * (len(keys) * len(FIELDS) + len(CACHE_FIELDS))
+    directory = _metrics_dir()
+    if directory and os.path.isdir(directory):
+        tag = _layout_tag()
+        prefix = f'rules-{tag}-'
+        with open(os.path.join(directory, f'{prefix}exited.bin'), 'a+b') as exited:
+            # one aggregator at a time, so a file is never folded twice or
+            # counted both before and after folding
+            if fcntl is not None:
+                fcntl.flock(exited, fcntl.LOCK_EX)
+                _prune(directory, tag, exited, len(totals))
+            for name in os.listdir(directory):
+                if name.startswith(prefix):
+                    _add(totals, os.path.join(directory, name))
+    elif _counters is not None:
+        totals = list(_counters)
+    return totals
+
+
+def snapshot():
+    """Return ``{(validator, rule): [evaluations, rejections, nanoseconds]}``."""
+    keys = _layout()
+    width = len(FIELDS)
+    totals = _totals()
+    return {key: totals[i * width:(i + 1) * width] for i, key in enumerate(keys)}
+
+
+def cache_snapshot():
+    """Return ``{'hits': n, 'misses': n}`` for the result cache."""
+    _layout()
+    totals = _totals()
+    return dict(zip(CACHE_FIELDS, totals[_cache_slot:]))
+
+
+# (metric name, help, field index, scale)
+_SERIES = (
+    ('strongpassword_rule_evaluations_total', 'Times a rule was evaluated.', 0, 1),
+    ('strongpassword_rule_rejections_total', 'Times a rule rejected the password.', 1, 1),
+    ('strongpassword_rule_seconds_total', 'Cumulative seconds spent evaluating a rule.', 2, 1e-9),
+)
+
+# (metric name, help, cache field)
+_CACHE_SERIES = (
+    ('strongpassword_result_cache_hits_total', 'Validation results served from the result cache.', 'hits'),
+    ('strongpassword_result_cache_misses_total', 'Validation results the result cache did not have.', 'misses'),
+)
+
+
+def render():
+    """Prometheus text exposition of snapshot() and cache_snapshot()."""
+    data = snapshot()
+    lines = []
+    for name, help_text, field, scale in _SERIES:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (validator, rule), values in data.items():
+            value = values[field] * scale if scale != 1 else values[field]
+            lines.append(f'{name}{{validator="{validator}",rule="{rule}"}} {value}')
+    cache = cache_snapshot()
+    for name, help_text, field in _CACHE_SERIES:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {cache[field]}')
+    return '\n'.join(lines) + '\n'
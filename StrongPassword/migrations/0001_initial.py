@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visitor', models.CharField(max_length=32, unique=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('solves', models.PositiveIntegerField(default=0)),
+                ('best_attempts', models.PositiveIntegerField(blank=True, null=True)),
+                ('best_seconds', models.FloatField(blank=True, null=True)),
+                ('seconds_spent', models.FloatField(default=0)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'attempt stats',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class AttemptStats(models.Model):
+    # One row per visitor (the id in the attempts cookie), written in batches
+    # by attempts.py; never read on the request path.
+    visitor = models.CharField(max_length=32, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    solves = models.PositiveIntegerField(default=0)
+    # fewest attempts and seconds a solve took, null until the first solve
+    best_attempts = models.PositiveIntegerField(null=True, blank=True)
+    best_seconds = models.FloatField(null=True, blank=True)
+    seconds_spent = models.FloatField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'attempt stats'
+
+    def __str__(self):
+        return f"{self.visitor}: {self.solves}/{self.attempts}"
@@ -0,0 +1,86 @@
+"""Palindrome analysis shared by the form rules and UltraStrongPasswordValidator.
+
+Both rule sets only ask "is there a palindrome of at least k characters?".
+Any palindrome of length m >= k + 2 has a palindrome of length m - 2 at the
+same centre, so the answer is yes exactly when a window of length k or k + 1
+is a palindrome. That is O(n) for the fixed k the rules use, with no
+per-candidate reversed copies.
+
+longest_palindrome() uses Manacher's algorithm for the longest palindrome and
+its position in O(n); describe_longest() turns that into the text the
+palindrome rules' error messages quote.
+"""
+
+
+def _is_palindrome_at(s, i, m):
+    # compare s[i:i+m] with its reverse without slicing
+    j = i + m - 1
+    while i < j:
+        if s[i] != s[j]:
+            return False
+        i += 1
+        j -= 1
+    return True
+
+
+def contains_palindrome(s, k=3):
+    """Return True if ``s`` has a palindromic substring of length >= ``k``."""
+    n = len(s)
+    if k <= 1:
+        return n >= k
+    if k == 3:
+        # hot path for the rules: "aba" or "abba"
+        if any(a == b for a, b in zip(s, s[2:])):
+            return True
+        return any(a == d and b == c for a, b, c, d in zip(s, s[1:], s[2:], s[3:]))
+    for m in (k, k + 1):
+        for i in range(n - m + 1):
+            if _is_palindrome_at(s, i, m):
+                return True
+    return False
+
+
+def manacher(s):
+    """Return the palindrome radii of ``s`` interleaved with separators.
+
+    Index 2*i + 1 of the result is the centre on character i, even indexes are
+    the centres between characters; each entry is the length of the longest
+    palindrome around that centre.
+    """
+    t = [None] * (2 * len(s) + 1)
+    t[1::2] = s
+    n = len(t)
+    radii = [0] * n
+    centre = right = 0
+    for i in range(n):
+        r = min(right - i, radii[2 * centre - i]) if i < right else 0
+        while i - r - 1 >= 0 and i + r + 1 < n and t[i - r - 1] == t[i + r + 1]:
+            r += 1
+        radii[i] = r
+        if i + r > right:
+            centre, right = i, i + r
+    return radii
+
+
+def longest_palindrome(s):
+    """Return ``(start, length)`` of the leftmost longest palindrome in ``s``."""
+    if not s:
+        return 0, 0
+    radii = manacher(s)
+    best = max(range(len(radii)), key=radii.__getitem__)
+    length = radii[best]
+    return (best - length) // 2, length
+
+
+def describe_longest(value):
+    """The longest palindrome the rules see in ``value``, e.g. "'aa' at position 4".
+
+    The rules look at the alphanumeric characters only, ignoring case; the
+    quoted characters and the 1-based position are those of ``value``.
+    """
+    index = [i for i, c in enumerate(value) if c.isalnum()]
+    if not index:
+        return "none"
+    start, length = longest_palindrome([value[i].lower() for i in index])
+    text = ''.join(value[i] for i in index[start:start + length])
+    return f"'{text}' at position {index[start] + 1}"
@@ -0,0 +1,250 @@
+"""Suggest the nearest valid password for a rejected one.
+
+The user's input is kept as the core of the suggestion and repaired with as
+few edits as possible:
+
+* characters that can never pass are dropped from the core (spaces, repeated
+  digits, digits int() rejects, the second of two identical letters, one
+  letter of 'admin' or a banned word);
+* the shortest prefix and suffix that fix the first-three / first / last /
+  third-last character rules are added;
+* the fewest extra digits that make the digit rules pass are chosen;
+* one small token per still-failing rule ('neo', 'dog', 'λ', '-', ...) is
+  added before the suffix, then the special-character parity and the length
+  (16, 36, 64, ...) are fixed last.
+
+Candidates are evaluated with live.LiveState, which updates the rule
+aggregates from the inserted characters only, so each step is cheap. Several
+variants (different specials and fillers) are tried until one passes, within
+STRONG_PASSWORD_REPAIR_BUDGET_MS of CPU time; when the budget runs out
+nothing is suggested.
+"""
+import difflib
+import random
+import time
+from collections import namedtuple
+from itertools import combinations
+
+from django.conf import settings
+
+from . import wordlists
+from .constraints import form_analysis
+from .generator import _LOWER_FILLER, _SPECIALS, _digits_ok
+from .live import LiveState
+from .rules import SPECIALS, UPPER, _first_three_ok, first_failure
+
+# ``edits`` use the same {"op": "insert" | "delete", ...} format as live.apply_edit
+Repair = namedtuple('Repair', 'password edits')
+
+_UPPER = 'DLMNSYZ'
+MAX_ADDED_DIGITS = 4
+# longer inputs are not worth repairing within a few milliseconds
+MAX_LENGTH = 128
+
+
+def _budget():
+    ms = getattr(settings, 'STRONG_PASSWORD_REPAIR_BUDGET_MS', 5)
+    return ms / 1000 if ms else 0
+
+
+def _core(value):
+    """``value`` without the characters no suggestion can keep."""
+    chars = []
+    seen_digits = set()
+    keep_doubles = 'password' in value.lower()
+    for c in value:
+        if c == ' ':
+            continue
+        if c.isdigit():
+            if c in seen_digits or not c.isdecimal():
+                continue
+            seen_digits.add(c)
+        if (not keep_doubles and chars and c.isalpha()
+                and chars[-1].isalpha() and chars[-1].lower() == c.lower()):
+            continue
+        chars.append(c)
+    core = ''.join(chars)
+    # drop one letter per forbidden word until none is left
+    while True:
+        hits = wordlists.WORDS.search(core.lower())
+        found = hits.get(wordlists.ADMIN) or hits.get(wordlists.BANNED)
+        if not found:
+            return core
+        start, word = found[0]
+        i = start + len(word) // 2
+        core = core[:i] + core[i + 1:]
+
+
+def _digits(present, rng, minimum=0):
+    """Fewest extra digits (at least ``minimum``) that make the digit rules pass, or None."""
+    free = [d for d in '0123456789' if d not in present]
+    rng.shuffle(free)
+    for k in range(max(minimum, 3 - len(present)), MAX_ADDED_DIGITS + 1):
+        for extra in combinations(free, k):
+            if _digits_ok(set(present) | set(extra)):
+                return list(extra)
+    return None
+
+
+# (rule, tokens) added when the rule still fails, in this order
+_TOKENS = (
+    ('movie_character', ('neo', 'han', 'thor')),
+    ('reversed_word', ('dog', 'evil')),
+    ('greek_letter', tuple('λμπσω')),
+    ('emoji', ('😀', '🔥', '🚀')),
+    ('dash', ('-',)),
+    ('punctuation', tuple('.,;:')),
+    ('letter_n_to_z', tuple('zxwvt')),
+)
+
+
+def _outside_words(value, pos):
+    # move pos left until it does not split a word-list hit ('password' keeps
+    # the identical-letter exemption only while it is whole)
+    spans = [(start, start + len(word))
+             for hits in wordlists.WORDS.search(value.lower()).values() for start, word in hits]
+    moved = True
+    while moved:
+        moved = False
+        for start, end in spans:
+            if start < pos < end:
+                pos, moved = start, True
+    return pos
+
+
+class _Builder:
+    """A LiveState plus a pointer to where new tokens are inserted."""
+
+    def __init__(self, core, rng):
+        self.state = LiveState(core)
+        self.rng = rng
+        self.used = set(core)
+        self.pos = len(core)
+
+    def insert(self, pos, text):
+        self.state.insert(pos, text)
+        self.used.update(text)
+        if pos <= self.pos:
+            self.pos += len(text)
+
+    def add(self, text):
+        self.insert(self.pos, text)
+
+    def pick(self, pool, avoid=()):
+        # a random token from pool that does not start or end with the same
+        # letter (ignoring case) as the characters around the insertion point
+        chars = self.state.chars
+        left = chars[self.pos - 1].lower() if self.pos > 0 else ''
+        right = chars[self.pos].lower() if self.pos < len(chars) else ''
+        options = [t for t in pool
+                   if t[0].lower() != left and t[-1].lower() != right and t not in avoid]
+        return self.rng.choice(options or list(pool))
+
+    def unused_special(self):
+        options = [c for c in _SPECIALS if c not in self.used]
+        return self.rng.choice(options or _SPECIALS)
+
+
+def _attempt(core, rng):
+    b = _Builder(core, rng)
+    present = [c for c in core if c.isdigit()]
+
+    # prefix: a special first, then a letter and a digit if the first three need them
+    lead = '' if core[:1] in SPECIALS else b.unused_special()
+    if lead:
+        b.insert(0, lead)
+    needs_digit = not _first_three_ok(lead + core)
+    extra = _digits(present, rng, minimum=1 if needs_digit else 0)
+    if extra is None:
+        return None
+    if needs_digit:
+        b.insert(1, rng.choice(_LOWER_FILLER) + extra.pop())
+
+    # suffix: a letter, then a mirrored special pair (also fixes the last
+    # character); without one, tokens go before the last three characters
+    st = b.state.statuses()
+    pos = _outside_words(b.state.value, len(b.state.chars) - 3)
+    if st['end_special_or_digit'] and st['third_last_letter'] and pos >= 3:
+        b.pos = pos
+    else:
+        s = b.unused_special()
+        last = b.state.chars[-1:]
+        b.state.insert(len(b.state.chars), b.pick(_LOWER_FILLER, avoid=last) + s + s)
+        b.used.add(s)
+
+    for d in extra:
+        b.add(d)
+
+    st = b.state.statuses()
+    while not (st['uppercase'] and st['upper_lower_counts']):
+        b.add(b.pick(_UPPER if b.state.class_counts[UPPER] < 2 else _LOWER_FILLER))
+        st = b.state.statuses()
+    for rule, tokens in _TOKENS:
+        if not st[rule]:
+            b.add(b.pick(tokens))
+            st = b.state.statuses()
+    while not st['two_vowels']:
+        b.add(b.pick('aeiou'))
+        st = b.state.statuses()
+    if not st['mirrored_pair']:
+        s = b.unused_special()
+        b.add(s + s)
+    elif not st['special']:
+        b.add(b.unused_special())
+    # later insertions can split the only palindrome and padding can add a
+    # fourth copy of the only character seen 3 times, so the last fixes are
+    # repeated on the padded password
+    for _ in range(3):
+        st = b.state.statuses()
+        if not st['palindrome']:
+            outer = b.pick(_LOWER_FILLER)
+            b.add(outer + b.pick(_LOWER_FILLER, avoid=outer) + outer)
+        if not st['char_three_times']:
+            s = b.unused_special()
+            b.add(s + b.pick(_LOWER_FILLER) + s + b.pick(_LOWER_FILLER) + s)
+        if b.state.nonalnum % 2 == 0:
+            b.add(b.unused_special())
+        n = len(b.state.chars)
+        target = next(length for length in form_analysis().lengths if length >= n)
+        for _ in range(target - n):
+            b.add(b.pick(_LOWER_FILLER))
+        st = b.state.statuses()
+        if all(st.values()):
+            return b.state.value
+        if not (st['char_three_times'] and st['odd_specials'] and st['palindrome']):
+            continue
+        return None
+    return None
+
+
+def _edits(old, new):
+    """live.apply_edit edits that turn ``old`` into ``new``, applied in order."""
+    edits = []
+    # right to left, so earlier positions stay valid
+    for op, i1, i2, j1, j2 in reversed(difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes()):
+        if op in ('delete', 'replace'):
+            edits.append({'op': 'delete', 'pos': i1, 'count': i2 - i1})
+        if op in ('insert', 'replace'):
+            edits.append({'op': 'insert', 'pos': i1, 'text': new[j1:j2]})
+    return edits
+
+
+def suggest(value, budget=None):
+    """Return a Repair for ``value``, or None if none was found in the budget."""
+    budget = _budget() if budget is None else budget
+    if not budget or not value or len(value) > MAX_LENGTH or not form_analysis().satisfiable:
+        return None
+    deadline = time.thread_time() + budget
+    core = _core(value)
+    # the same input always gets the same suggestion
+    rng = random.Random(value)
+    while time.thread_time() < deadline:
+        password = _attempt(core, rng)
+        if password is None:
+            continue
+        # the live state mirrors the rules, but only suggest what the real
+        # check accepts too
+        if first_failure(password) is None:
+            return Repair(password, _edits(value, password))
+    return None
+
@@ -0,0 +1,288 @@
+from collections import Counter, namedtuple
+from functools import cached_property, reduce
+from itertools import compress, count
+from operator import eq, or_
+from time import perf_counter_ns
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+
+from . import metrics
+from .breached import is_breached
+from .charclass import (
+    ALNUM, ALPHA, BINARY, DECIMAL, DIGIT, EMOJI, EMOJI_START, GREEK, GREEK_LETTERS, LOWER, CLASS_FLAGS,
+    NZ, PUNCT, SPECIAL, SPECIALS, UPPER, VOWEL, VOWELS, flags_of,
+)
+from .cache import MISS, RESULTS
+from .constraints import form_analysis
+from .emojis import contains_emoji
+from .palindromes import contains_palindrome, describe_longest
+from .scheduler import ADAPTIVE, CANONICAL, MODES, RuleScheduler
+from . import wordlists
+
+# Rule engine behind StrongPassword.clean_password.
+#
+# Everything the rules need is built once at import (word lists live in
+# wordlists.py). scan() fills a Features vector with a few C-level passes
+# over the password (translate() against the class table in charclass.py,
+# str.lower(), str.count()); the costlier features (word-list hits, emoji,
+# adjacent pairs) are computed when a rule first asks for them. Every rule is
+# a cheap test against that vector. Rules run in the original hand-written
+# order and raise the first failing message, exactly like the old inline checks.
+
+VALID_DART_SCORES = ("180", "60", "100", "120", "140", "150", "170")
+
+
+class Features:
+    """Per-character-class feature vector of one password (see scan())."""
+
+    def __init__(self, value):
+        self.value = value
+        self.val = val = value.lower()
+        self.length = len(value)
+        # class bits of the distinct characters, looked up in C (see
+        # charclass.CLASS_FLAGS); the counts come from the str methods the
+        # bits stand for, and are only taken when some character has the bit
+        flags = self.flags = reduce(or_, map(CLASS_FLAGS.__getitem__, map(ord, set(value))), 0)
+        self.upper = sum(map(str.isupper, value)) if flags & UPPER else 0
+        self.lower = sum(map(str.islower, value)) if flags & LOWER else 0
+        self.nonalnum = self.length - sum(map(str.isalnum, value)) if flags & ALNUM else self.length
+        # lowering the whole string gives the same vowels as lowering each character
+        self.vowels = sum(map(val.count, VOWELS)) if flags & VOWEL else 0
+        # digits such as '²' pass isdigit() but have no value for int(); they
+        # count as digits, and make the digit sum unreadable
+        self.digits = list(filter(str.isdigit, value)) if flags & DIGIT else []
+        self.digit_values = [int(c) for c in self.digits if flags_of(c) & DECIMAL]
+        self.digit_sum = sum(self.digit_values)
+        self.unreadable_digits = len(self.digits) - len(self.digit_values)
+
+    @cached_property
+    def counts(self):
+        return Counter(self.value)
+
+    @cached_property
+    def _equal_pairs(self):
+        # (double letter, mirrored pair): two adjacent letters that are the
+        # same ignoring case ("aa", "aA"), two adjacent identical non-letters
+        # ("!!", "11"). The string is compared against itself shifted by one
+        # in C, and only the equal pairs are looked at.
+        value = self.value
+        lows = self.val if value.isascii() else list(map(str.lower, value))
+        double = mirrored = False
+        for i in compress(count(), map(eq, lows, lows[1:])):
+            a, b = value[i], value[i + 1]
+            if flags_of(a) & flags_of(b) & ALPHA:
+                double = True
+            elif a == b:
+                mirrored = True
+        return double, mirrored
+
+    @property
+    def double_letter(self):
+        return self._equal_pairs[0]
+
+    @property
+    def mirrored_pair(self):
+        return self._equal_pairs[1]
+
+    @cached_property
+    def hits(self):
+        # every word-list hit, from one automaton pass over the lower-cased value
+        return wordlists.WORDS.search(self.val)
+
+    @cached_property
+    def has_emoji(self):
+        # only characters that can start an emoji need the grapheme scan
+        return bool(self.flags & (EMOJI | EMOJI_START)) and contains_emoji(self.value)
+
+    @property
+    def longest_palindrome(self):
+        # only formatted into the palindrome message, so not cached
+        return describe_longest(self.value)
+
+    @cached_property
+    def stripped(self):
+        s = ''.join(filter(str.isalnum, self.value))
+        # str.lower() only differs from per-character lowering for final sigma
+        if 'Σ' in s:
+            return ''.join(c.lower() for c in s)
+        return s.lower()
+
+
+def scan(value):
+    """Return the Features of ``value``."""
+    return Features(value)
+
+
+def is_prime(n):
+    if n < 2: return False
+    for i in range(2, int(n**0.5)+1):
+        if n % i == 0:
+            return False
+    return True
+
+
+def _first_three_ok(value):
+    if value.startswith(VALID_DART_SCORES):
+        return True
+    head = 0
+    for c in value[:3]:
+        flags = flags_of(c)
+        # a symbol is anything that is not alphanumeric
+        head |= flags if flags & ALNUM else flags | SPECIAL
+    return head & ALPHA and head & DIGIT and head & SPECIAL
+
+
+# ``test`` returns True when the rule passes. ``message`` is formatted with the
+# Features as ``f`` so it can quote computed values.
+Rule = namedtuple('Rule', 'name test message')
+
+# Structural checks only look at the raw string and run before the scan, so
+# later index access (value[0], value[-3]) is always safe.
+STRUCTURAL_RULES = (
+    Rule('too_short', lambda v: len(v) >= 8,
+         "❌ Password is too short. Try at least 8 characters."),
+    Rule('no_spaces', lambda v: ' ' not in v,
+         "⛔ No spaces allowed in the password."),
+    Rule('start_special', lambda v: flags_of(v[0]) & SPECIAL,
+         "❌ Password must start with a special character."),
+    Rule('end_special_or_digit', lambda v: flags_of(v[-1]) & (SPECIAL | DIGIT),
+         "🔚 Password must end with a special character or a digit."),
+)
+
+RULES = (
+    Rule('uppercase', lambda f: f.upper > 0,
+         "❌ Needs at least one uppercase letter."),
+    Rule('special', lambda f: f.flags & SPECIAL,
+         "❌ Include at least one special character (!@#...)."),
+    Rule('three_digits', lambda f: len(f.digits) >= 3,
+         "❌ Include at least 3 numbers."),
+    Rule('unique_digits', lambda f: len(f.digits) == len(set(f.digits)),
+         "🔂 No digit should repeat."),
+    Rule('prime_digit_sum', lambda f: not f.unreadable_digits and is_prime(f.digit_sum),
+         "❌ Sum of numbers in password ({f.digit_sum}) must be a prime number."),
+    Rule('two_vowels', lambda f: f.vowels >= 2,
+         "❌ Password must contain at least 2 vowels (a, e, i, o, u)."),
+    Rule('emoji', lambda f: f.has_emoji,
+         "😂 Must include at least one emoji."),
+    Rule('palindrome', lambda f: contains_palindrome(f.stripped),
+         "🔁 Password must contain a palindrome (at least 3 characters); the longest now is {f.longest_palindrome}."),
+    # If "password" is present the identical-letter check is skipped.
+    Rule('identical_letters', lambda f: wordlists.PASSWORD in f.hits or not f.double_letter,
+         "🚫 No identical consecutive letters allowed."),
+    Rule('mirrored_pair', lambda f: f.mirrored_pair,
+         "🪞 Include at least one mirrored non-letter pair (like '!!' or '11')."),
+    Rule('upper_lower_counts', lambda f: f.upper >= 2 and f.lower >= 3,
+         "🔠 Password must contain at least 2 uppercase and 3 lowercase letters."),
+    Rule('digit_div_3', lambda f: any(v % 3 == 0 for v in f.digit_values),
+         "➗ Include at least one digit divisible by 3 (e.g., 3, 6, 9)."),
+    Rule('no_admin', lambda f: wordlists.ADMIN not in f.hits,
+         "👮 Password must not contain the word 'admin'."),
+    Rule('dash', lambda f: "-" in f.value,
+         "➖ Include any dash (-)."),
+    Rule('length_multiple_of_4', lambda f: f.length % 4 == 0,
+         "🔢 Password length must be a multiple of 4."),
+    Rule('length_square', lambda f: int(f.length**0.5) ** 2 == f.length,
+         "📏 Password length must be a perfect square (4, 16, 36...)."),
+    Rule('char_three_times', lambda f: 3 in f.counts.values(),
+         "🔁 Include one character exactly 3 times."),
+    Rule('third_last_letter', lambda f: flags_of(f.value[-3]) & ALPHA,
+         "💡 The third last character must be a letter."),
+    Rule('movie_character', lambda f: wordlists.MOVIE_CHARACTER in f.hits,
+         "🎬 Password must include the name of a famous character from one of these movies: "
+         + ", ".join(wordlists.MOVIES.keys()) + "."),
+    Rule('letter_n_to_z', lambda f: f.flags & NZ,
+         "🔡 Include at least one letter from n-z."),
+    Rule('punctuation', lambda f: f.flags & PUNCT,
+         "✍️ Include at least one punctuation mark (.,;:)."),
+    Rule('first_three', lambda f: _first_three_ok(f.value),
+         "🎭 First three characters must include a letter, a digit, and a symbol."),
+    Rule('binary_digit', lambda f: f.flags & BINARY,
+         "💻 Include at least one binary digit (0 or 1)."),
+    Rule('odd_specials', lambda f: f.nonalnum % 2 == 1,
+         "🧮 Total special characters must be an odd number."),
+    Rule('reversed_word', lambda f: wordlists.REVERSED_WORD in f.hits,
+         "🔄 Include a real word that corresponds to a famous reversed word like "
+         + ", ".join(w[::-1] for w in wordlists.REVERSED_WORDS) + "."),
+    Rule('greek_letter', lambda f: f.flags & GREEK,
+         "🧿 Include at least one Greek letter (α-ω)."),
+    # only has entries when STRONG_PASSWORD_BANNED_WORDS_FILE is configured
+    Rule('banned_word', lambda f: wordlists.BANNED not in f.hits,
+         "🚫 Password must not contain a banned word."),
+    # the whole password against the shared common/breached list (breached.py)
+    Rule('common_password', lambda f: not is_breached(f.value),
+         "🔓 This password is on a list of common or breached passwords."),
+)
+
+
+# Optional adaptive ordering of RULES (see scheduler.py). Per-rule metrics,
+# when enabled, always measure the canonical order.
+_rule_order = getattr(settings, 'STRONG_PASSWORD_RULE_ORDER', CANONICAL)
+if _rule_order not in MODES:
+    raise ImproperlyConfigured(f"STRONG_PASSWORD_RULE_ORDER must be one of {', '.join(MODES)}.")
+_scheduler = None if _rule_order == CANONICAL else RuleScheduler(RULES, exact=_rule_order == ADAPTIVE)
+
+
+def first_failure(value):
+    """Return ``(code, message)`` of the first rule ``value`` fails, or None."""
+    if metrics.enabled:
+        return _first_failure_timed(value)
+
+    for rule in STRUCTURAL_RULES:
+        if not rule.test(value):
+            return rule.name, rule.message
+
+    f = scan(value)
+    if _scheduler is not None:
+        i = _scheduler.first_failure(f)
+        if i is None:
+            return None
+        rule = RULES[i]
+        return rule.name, rule.message.format(f=f)
+
+    for rule in RULES:
+        if not rule.test(f):
+            return rule.name, rule.message.format(f=f)
+    return None
+
+
+def _first_failure_timed(value):
+    # first_failure() with per-rule metrics; kept separate so the default path
+    # pays nothing for instrumentation
+    clock = perf_counter_ns
+    for rule in STRUCTURAL_RULES:
+        start = clock()
+        ok = rule.test(value)
+        metrics.record('strong', rule.name, not ok, clock() - start)
+        if not ok:
+            return rule.name, rule.message
+
+    start = clock()
+    f = scan(value)
+    metrics.record('strong', 'scan', False, clock() - start)
+    for rule in RULES:
+        start = clock()
+        ok = rule.test(f)
+        metrics.record('strong', rule.name, not ok, clock() - start)
+        if not ok:
+            return rule.name, rule.message.format(f=f)
+    return None
+
+
+def check_password(value):
+    """Run every StrongPassword rule against ``value`` and raise the first failure."""
+    if not value:
+        raise ValidationError("❌ Password is required.", code='required')
+
+    analysis = form_analysis()
+    if not analysis.satisfiable:
+        raise ValidationError(analysis.message, code='unsatisfiable')
+
+    failure = RESULTS.get('strong', value)
+    if failure is MISS:
+        failure = first_failure(value)
+        RESULTS.set('strong', value, failure)
+    if failure:
+        code, message = failure
+        raise ValidationError(message, code=code)
+    return value
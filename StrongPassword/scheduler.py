@@ -0,0 +1,75 @@
+import time
+
+# Adaptive fail-fast ordering of the feature rules in rules.RULES.
+#
+# The scheduler keeps, per rule, how often it rejected and how long it took,
+# and periodically reorders the rules by rejection probability per unit of
+# cost, so cheap rules that usually reject run before expensive ones.
+#
+# Index-sensitive checks are pinned: the structural rules (length, first and
+# last character) always run first in their canonical order, before the scan,
+# so every scheduled rule can index the password safely.
+#
+# In 'adaptive' mode the reported failure is still the canonical one. Once a
+# rule at canonical position k rejects, only rules before k can change the
+# answer, so everything after k is skipped and the result is the lowest
+# failing position, i.e. exactly what the canonical order would report.
+# 'adaptive_fast' stops at the first rejection in scheduled order instead;
+# cheaper, but the message shown then depends on recent traffic.
+
+CANONICAL = 'canonical'
+ADAPTIVE = 'adaptive'
+ADAPTIVE_FAST = 'adaptive_fast'
+MODES = (CANONICAL, ADAPTIVE, ADAPTIVE_FAST)
+
+
+class RuleScheduler:
+    def __init__(self, rules, exact=True, reorder_every=1024, sample_every=16, decay=0.9):
+        self.rules = rules
+        self.exact = exact
+        self.reorder_every = reorder_every
+        self.sample_every = sample_every
+        self.decay = decay
+        n = len(rules)
+        self.order = list(range(n))
+        # optimistic priors until a rule has been seen a few times
+        self.evaluations = [1] * n
+        self.rejections = [1] * n
+        self.cost = [1000.0] * n
+        self.calls = 0
+
+    def first_failure(self, f):
+        """Return the index (into ``rules``) of the failing rule, or None."""
+        self.calls += 1
+        timed = self.calls % self.sample_every == 0
+        rules = self.rules
+        best = None
+        for i in self.order:
+            if best is not None:
+                if not self.exact:
+                    break
+                if i > best:
+                    continue
+            if timed:
+                start = time.perf_counter_ns()
+                ok = rules[i].test(f)
+                self.cost[i] += ((time.perf_counter_ns() - start) - self.cost[i]) * (1 - self.decay)
+            else:
+                ok = rules[i].test(f)
+            self.evaluations[i] += 1
+            if not ok:
+                self.rejections[i] += 1
+                if best is None or i < best:
+                    best = i
+        if self.calls % self.reorder_every == 0:
+            self.reorder()
+        return best
+
+    def reorder(self):
+        def rank(i):
+            return self.rejections[i] / self.evaluations[i] / max(self.cost[i], 1.0)
+        # the new list is swapped in whole, concurrent callers see either order
+        self.order = sorted(range(len(self.rules)), key=rank, reverse=True)
+
+    def reset(self):
+        self.__init__(self.rules, self.exact, self.reorder_every, self.sample_every, self.decay)
@@ -42,11 +42,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'StrongPassword',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    # "whitenoise.middleware.WhiteNoiseMiddleware"
+    # serves STATIC_ROOT; fingerprinted files get a far-future immutable
+    # Cache-Control, and the .br/.gz next to them when the browser accepts it
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # before sessions and CSRF, so rejected requests cost as little as possible
+    'StrongPassword.admission.AdmissionControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -97,7 +102,8 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        # Django's CommonPasswordValidator on the shared memory-mapped filter
+        'NAME': 'StrongPassword.breached.BreachedPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -124,8 +130,104 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
-# STATICSTORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# `manage.py collectstatic` is the build step: it copies everything here with
+# the content hash in the file name (password.3f2a9c1e5b7d.css), writes a .gz of
+# each, plus a .br when the Brotli package is installed, and {% static %}
+# links to the hashed names. With DEBUG on the files are served unhashed
+# straight from STATICFILES_DIRS, no collectstatic needed.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# StrongPassword rules
+
+# Optional plain text file of extra banned words or characters, one per line
+# ('#' starts a comment). Loaded into the word-list automaton at startup.
+STRONG_PASSWORD_BANNED_WORDS_FILE = None
+
+# Common / breached password filter (see StrongPassword/breached.py), mapped
+# read-only and shared by all workers. None uses the shipped filter built from
+# Django's common password list; a path uses a filter made with
+# `manage.py build_breached_filter`; False turns the check off.
+STRONG_PASSWORD_BREACHED_FILTER = None
+
+# Batch JSON API (api/validate/): per-request limits and process-pool sizing.
+STRONG_PASSWORD_BATCH_MAX_ITEMS = 10_000
+STRONG_PASSWORD_BATCH_MAX_LENGTH = 1024
+STRONG_PASSWORD_BATCH_CHUNK_SIZE = 500
+STRONG_PASSWORD_BATCH_WORKERS = None  # None = one per CPU
+# Largest batch body: a full batch of the longest passwords as UTF-8 JSON (up
+# to 4 bytes a character, plus quotes and a comma each). Larger bodies get a
+# 413 from admission control; Django's own body limit is raised to match, the
+# form views are capped far below it by STRONG_PASSWORD_MAX_LENGTH.
+STRONG_PASSWORD_BATCH_MAX_BYTES = STRONG_PASSWORD_BATCH_MAX_ITEMS * (STRONG_PASSWORD_BATCH_MAX_LENGTH * 4 + 3) + 4096
+DATA_UPLOAD_MAX_MEMORY_SIZE = STRONG_PASSWORD_BATCH_MAX_BYTES
+
+# Validation result cache (see StrongPassword/cache.py). Entries live until the
+# hour rolls over. Set the alias to a CACHES entry to share results across
+# workers; the in-process LRU is always consulted first.
+STRONG_PASSWORD_RESULT_CACHE_SIZE = 4096
+STRONG_PASSWORD_RESULT_CACHE_ALIAS = None
+
+# Per-rule and result-cache metrics served at /metrics (see StrongPassword/metrics.py). Point
+# the directory at storage shared by all workers to aggregate across them.
+STRONG_PASSWORD_METRICS = False
+STRONG_PASSWORD_METRICS_DIR = None
+
+# Order of the StrongPassword feature rules (see StrongPassword/scheduler.py):
+# 'canonical' (hand-written order), 'adaptive' (cheapest likely rejections
+# first, same messages as canonical) or 'adaptive_fast' (first rejection in
+# adaptive order; messages may vary with traffic).
+STRONG_PASSWORD_RULE_ORDER = 'canonical'
+
+# Live validation over WebSocket (ws/validate/, ASGI only): connections are
+# closed once the password grows past this many characters.
+STRONG_PASSWORD_LIVE_MAX_LENGTH = 1024
+
+# CPU time (ms) MakePassword may spend looking for the closest valid password
+# to show next to the error (see StrongPassword/repair.py); 0 turns it off.
+STRONG_PASSWORD_REPAIR_BUDGET_MS = 5
+
+# Attempt counters behind the badges on success.html (see
+# StrongPassword/attempts.py). Badges come from a signed cookie; the totals
+# are written to the database in one transaction every N attempts or T
+# seconds, whichever comes first. Set STORE to False to keep only the cookie.
+STRONG_PASSWORD_ATTEMPTS_STORE = True
+STRONG_PASSWORD_ATTEMPTS_FLUSH_EVERY = 100
+STRONG_PASSWORD_ATTEMPTS_FLUSH_SECONDS = 5
+
+# Fewest-tries / fastest-time ranks on success.html (see
+# StrongPassword/leaderboard.py): kept in memory and rebuilt from the attempt
+# totals this often, to pick up other workers' solves.
+STRONG_PASSWORD_LEADERBOARD_REFRESH_SECONDS = 60
+
+# Admission control for the validation views (see StrongPassword/admission.py).
+# Longer 'password' fields are rejected with 413 before any form is built.
+STRONG_PASSWORD_MAX_LENGTH = 1024
+# Token bucket per client IP: requests per second (0 turns it off) and burst.
+# Set the alias to a CACHES entry shared by all workers (e.g. Redis or
+# memcached) so they draw from the same buckets.
+STRONG_PASSWORD_RATE_LIMIT = 5
+STRONG_PASSWORD_RATE_LIMIT_BURST = 20
+STRONG_PASSWORD_RATE_LIMIT_CACHE_ALIAS = None
+# Behind a proxy: the META key holding the client IP (e.g. 'HTTP_X_REAL_IP')
+# and the one with the time the proxy received the request
+# (e.g. 'HTTP_X_REQUEST_START', "t=<epoch seconds, ms or us>"). Only set them
+# when the proxy overwrites these headers.
+STRONG_PASSWORD_CLIENT_IP_HEADER = None
+STRONG_PASSWORD_REQUEST_START_HEADER = None
+# Form and batch views validating at once per process (validation holds the
+# GIL, so more threads only share it); the others queue. Requests that queued
+# longer than MAX_QUEUE_MS are answered 503 instead of being validated, and a
+# standing queue sheds new arrivals; 0 turns shedding off.
+STRONG_PASSWORD_VALIDATION_CONCURRENCY = 2
+STRONG_PASSWORD_MAX_QUEUE_MS = 500
@@ -16,9 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from .views import MakePassword
+from .views import BatchValidate, MakePassword, Metrics, StreamValidate
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', MakePassword, name='password')
+    path('', MakePassword, name='password'),
+    path('api/validate/', BatchValidate, name='batch-validate'),
+    path('api/stream/', StreamValidate, name='stream-validate'),
+    path('metrics', Metrics, name='metrics'),
 ]
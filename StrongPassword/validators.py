@@ -1,132 +1,224 @@
 from django.core.exceptions import ValidationError
 import datetime
-import emoji
+import hashlib
 import unicodedata
 import string
+from time import perf_counter_ns
+
+from . import constraints, metrics
+from .cache import MISS, RESULTS
+from .charclass import (
+    ALNUM, ALPHA, DECIMAL, DIGIT, EMOJI, EMOJI_START, MUSICAL_NOTES, NOTE, SPECIAL, SPECIALS, UPPER, VOWEL, flags_of, union,
+)
+from .emojis import contains_emoji
+from .palindromes import contains_palindrome, describe_longest
+from . import wordlists
+
+DART_SCORES = ('60', '100', '120', '140', '180')
+
+# codes yielded by UltraStrongPasswordValidator.evaluate(), in order
+RULE_CODES = (
+    'too_short', 'uppercase', 'special', 'three_digits', 'prime_digit_sum',
+    'no_vowels', 'start_end_special', 'emoji', 'palindrome', 'ninety',
+    'password_word', 'consecutive_letters', 'length_hour', 'country',
+    'musical_note', 'weekday_reversed', 'no_snake', 'spaceship', 'maiden_letter',
+    'length_square', 'number_69_420', 'meow', 'non_ascii', 'ascii_sum_mod_7',
+    'no_death', 'alnum_palindrome', 'calculator', 'dart_score', 'spice',
+)
+
+# word-list rules whose list is a validator attribute: group -> (attribute,
+# default list); the defaults are matched by the shared wordlists.WORDS
+CUSTOM_WORD_LISTS = {
+    wordlists.COUNTRY: ('nonexistent_countries', wordlists.NONEXISTENT_COUNTRIES),
+    wordlists.SPACESHIP: ('fictional_spaceships', wordlists.FICTIONAL_SPACESHIPS),
+    wordlists.SPICE: ('spices', wordlists.SPICES),
+}
 
 # 3️⃣ Gamify it
 
-# Keep a counter of attempts or time spent (optional).
-
-# Give badges or funny titles depending on how many tries it took.
+# Attempts and time spent are counted per visitor and badges are given on
+# success, see attempts.py.
 
 
 class UltraStrongPasswordValidator:
     def __init__(self, mothers_maiden_letter='a'):
         self.mothers_maiden_letter = mothers_maiden_letter.lower()
         self.special_chars = "!@#$%^&*()-_+=[]{};:,.<>?/|\\~"
-        self.nonexistent_countries = ['Yugoslavia', 'Czechoslovakia', 'Siam', 'Prussia', 'OttomanEmpire', 'EastGermany']
-        self.fictional_spaceships = ['MillenniumFalcon', 'Serenity', 'Enterprise', 'Galactica', 'Rocinante']
+        # matched through the shared wordlists.WORDS automaton unless changed
+        self.nonexistent_countries = list(wordlists.NONEXISTENT_COUNTRIES)
+        self.fictional_spaceships = list(wordlists.FICTIONAL_SPACESHIPS)
         self.musical_notes = ['♪', '♫', '♬']
         self.wingdings_characters = ['🂡', '🃏', '✈']
         self.oxford_words = ['apple', 'banana', 'civic', 'turmeric', 'falcon', 'friend']
-        self.spices = ['turmeric', 'cumin', 'paprika', 'saffron', 'basil']
+        self.spices = list(wordlists.SPICES)
 
     def __call__(self, value: str):
-        errors = []
+        # results only change with the hour and weekday, see cache.py
+        now = datetime.datetime.now()
+        # during hours when no password can pass, skip the rules entirely
+        analysis = constraints.ultra_analysis(self, now)
+        if not analysis.satisfiable:
+            raise ValidationError([ValidationError(analysis.message, code='unsatisfiable')])
+
+        namespace = f'ultra:{self.fingerprint()}'
+        failures = RESULTS.get(namespace, value, now)
+        if failures is MISS:
+            if metrics.enabled:
+                # the upfront scan gets its own slot instead of being charged
+                # to the first rule
+                start = perf_counter_ns()
+                scanned = self._scan(value)
+                metrics.record('ultra', 'scan', False, perf_counter_ns() - start)
+                results = metrics.timed('ultra', self.evaluate(value, now, scanned))
+            else:
+                results = self.evaluate(value, now)
+            failures = [(code, message) for code, ok, message in results if not ok]
+            RESULTS.set(namespace, value, failures, now)
+        errors = [ValidationError(message, code=code) for code, message in failures]
+
+        # Final decision
+        if errors:
+            raise ValidationError(errors)
+
+    def _scan(self, value: str):
+        val = value.lower()
+        hits = wordlists.WORDS.search(val)
+        # class bits of every character present; the attribute lists can be
+        # customised per instance, the table only covers the defaults
+        present = union(value)
+        table_specials = frozenset(self.special_chars) == SPECIALS
+        return val, hits, present, table_specials
+
+    def evaluate(self, value: str, now=None, scanned=None):
+        """Yield ``(code, ok, message)`` for every rule, in order."""
+        val, hits, present, table_specials = scanned or self._scan(value)
 
         # Base rules
-        if len(value) < 8:
-            errors.append("❌ Password is too short. Try at least 8 characters.")
+        yield ('too_short', len(value) >= 8,
+               "❌ Password is too short. Try at least 8 characters.")
 
-        if not any(c.isupper() for c in value):
-            errors.append("❌ Needs at least one uppercase letter.")
+        yield ('uppercase', bool(present & UPPER),
+               "❌ Needs at least one uppercase letter.")
 
-        if not any(c in self.special_chars for c in value):
-            errors.append("❌ Include at least one special character (!@#...).")
+        yield ('special', bool(present & SPECIAL) if table_specials
+               else any(c in self.special_chars for c in value),
+               "❌ Include at least one special character (!@#...).")
 
-        digits = [int(c) for c in value if c.isdigit()]
-        if len(digits) < 3:
-            errors.append("❌ Include at least 3 numbers.")
+        digits = [c for c in value if flags_of(c) & DIGIT] if present & DIGIT else []
+        yield ('three_digits', len(digits) >= 3,
+               "❌ Include at least 3 numbers.")
 
-        if not self._is_prime(sum(digits)):
-            errors.append(f"❌ Sum of numbers in password ({sum(digits)}) must be a prime number.")
+        # digits such as '²' pass isdigit() but have no value for int(), so
+        # with one of them the sum cannot be prime
+        values = [int(c) for c in digits if flags_of(c) & DECIMAL]
+        yield ('prime_digit_sum', len(values) == len(digits) and self._is_prime(sum(values)),
+               f"❌ Sum of numbers in password ({sum(values)}) must be a prime number.")
 
-        if any(v in value.lower() for v in 'aeiou'):
-            errors.append("❌ Password must not contain any vowels (a, e, i, o, u).")
+        yield ('no_vowels', not present & VOWEL,
+               "❌ Password must not contain any vowels (a, e, i, o, u).")
 
-        if value[0] not in self.special_chars or value[-1] not in self.special_chars:
-            errors.append("❌ Start and end your password with a special character.")
+        yield ('start_end_special', bool(flags_of(value[0]) & flags_of(value[-1]) & SPECIAL) if table_specials
+               else value[0] in self.special_chars and value[-1] in self.special_chars,
+               "❌ Start and end your password with a special character.")
 
-        if not any(c in emoji.EMOJI_DATA for c in value):
-            errors.append("😂 Must include at least one emoji.")
+        yield ('emoji', bool(present & (EMOJI | EMOJI_START)) and contains_emoji(value),
+               "😂 Must include at least one emoji.")
 
-        if not self._contains_palindrome(value):
-            errors.append("🔁 Password must contain a palindrome (at least 3 characters).")
+        # both palindrome rules strip to the same alnum string, so analyse it once
+        has_palindrome = self._contains_palindrome(value)
+        longest = '' if has_palindrome else f"; the longest now is {describe_longest(value)}"
+        yield ('palindrome', has_palindrome,
+               f"🔁 Password must contain a palindrome (at least 3 characters){longest}.")
 
         # letters = [c.lower() for c in value if c.isalpha()]
         # if len(letters) != len(set(letters)):
         #     errors.append("🌀 All alphabet letters must be unique, no repeats.")
 
-        if '90' not in value:
-            errors.append("🔢 Include the number '90' (ASCII of Z).")
+        yield ('ninety', wordlists.NINETY in hits,
+               "🔢 Include the number '90' (ASCII of Z).")
 
-        if "password" not in value.lower():
-            errors.append("😂 Must ironically include the word 'password'.")
+        yield ('password_word', wordlists.PASSWORD in hits,
+               "😂 Must ironically include the word 'password'.")
 
-        for i in range(1, len(value)):
-            if value[i].isalpha() and value[i - 1].isalpha():
-                errors.append("🚫 No consecutive letters allowed.")
-                break
+        alpha = [flags_of(c) & ALPHA for c in value] if present & ALPHA else ()
+        yield ('consecutive_letters', not any(a & b for a, b in zip(alpha, alpha[1:])),
+               "🚫 No consecutive letters allowed.")
 
         # Extended creative rules
-        now = datetime.datetime.now()
-        if len(value) != now.hour:
-            errors.append("⌚ Password length must match the current hour in 24-hour format.")
+        now = now or datetime.datetime.now()
+        yield ('length_hour', len(value) == now.hour,
+               "⌚ Password length must match the current hour in 24-hour format.")
 
-        if not any(c.lower() in value.lower() for c in self.nonexistent_countries):
-            errors.append("🌍 Must contain the name of a country that doesn’t exist anymore.")
+        yield ('country', self.has_word(wordlists.COUNTRY, hits, val),
+               "🌍 Must contain the name of a country that doesn’t exist anymore.")
 
-        if not any(note in value for note in self.musical_notes):
-            errors.append("🎼 Must include at least one musical note character.")
+        yield ('musical_note', bool(present & NOTE) if frozenset(self.musical_notes) == MUSICAL_NOTES
+               else any(note in value for note in self.musical_notes),
+               "🎼 Must include at least one musical note character.")
 
-        if now.strftime("%A")[::-1].lower() not in value.lower():
-            errors.append("📅 Must contain the current day of the week in reverse.")
+        yield ('weekday_reversed', now.strftime("%A")[::-1].lower() in val,
+               "📅 Must contain the current day of the week in reverse.")
 
-        if any(c in 'snake' for c in value.lower()):
-            errors.append("🐍 Must NOT contain any letters from the word 'snake'.")
+        yield ('no_snake', not any(c in 'snake' for c in val),
+               "🐍 Must NOT contain any letters from the word 'snake'.")
 
-        if not any(ship.lower() in value.lower() for ship in self.fictional_spaceships):
-            errors.append("🚀 Must include the name of a fictional spaceship.")
+        yield ('spaceship', self.has_word(wordlists.SPACESHIP, hits, val),
+               "🚀 Must include the name of a fictional spaceship.")
 
-        if not value[0].lower() == self.mothers_maiden_letter:
-            errors.append("🧠 First letter must match your mother's maiden name's first letter.")
+        yield ('maiden_letter', value[0].lower() == self.mothers_maiden_letter,
+               "🧠 First letter must match your mother's maiden name's first letter.")
 
-        if int(len(value)**0.5) ** 2 != len(value):
-            errors.append("📏 Password length must be a perfect square.")
+        yield ('length_square', int(len(value)**0.5) ** 2 == len(value),
+               "📏 Password length must be a perfect square.")
 
-        if not any(str(n) in value for n in range(69, 421)):
-            errors.append("🎲 Must include a number between 69 and 420.")
+        yield ('number_69_420', wordlists.NUMBER_69_420 in hits,
+               "🎲 Must include a number between 69 and 420.")
 
-        meow_count = sum(1 for c in value.lower() if c in 'meow')
-        if not (1 <= meow_count <= 2):
-            errors.append("🐱 Must contain at least 1 and at most 2 letters from 'meow'.")
+        meow_count = sum(1 for c in val if c in 'meow')
+        yield ('meow', 1 <= meow_count <= 2,
+               "🐱 Must contain at least 1 and at most 2 letters from 'meow'.")
 
-        if not any(ord(c) > 127 for c in value):
-            errors.append("🔣 Must have at least one non-English Unicode symbol.")
+        yield ('non_ascii', any(ord(c) > 127 for c in value),
+               "🔣 Must have at least one non-English Unicode symbol.")
 
         ascii_sum = sum(ord(c) for c in value)
-        if ascii_sum % 7 != 0:
-            errors.append("📉 ASCII sum of all characters must be divisible by 7.")
+        yield ('ascii_sum_mod_7', ascii_sum % 7 == 0,
+               "📉 ASCII sum of all characters must be divisible by 7.")
 
-        if any(c in 'death' for c in value.lower()):
-            errors.append("💀 Must NOT include any letters from 'death'.")
+        yield ('no_death', not any(c in 'death' for c in val),
+               "💀 Must NOT include any letters from 'death'.")
 
-        if not self._contains_palindrome(''.join(c for c in value if c.isalnum())):
-            errors.append("🧊 Must contain a palindrome of at least 3 characters.")
+        yield ('alnum_palindrome', has_palindrome,
+               f"🧊 Must contain a palindrome of at least 3 characters{longest}.")
 
-        if not self._is_calculator_compatible(value):
-            errors.append("🪐 Must be readable upside down with calculator digits.")
+        yield ('calculator', not present & DIGIT or self._is_calculator_compatible(value),
+               "🪐 Must be readable upside down with calculator digits.")
 
-        if not any(value.startswith(str(score)) for score in [60, 100, 120, 140, 180]):
-            errors.append("🎯 Must start with a valid dart score.")
+        yield ('dart_score', value.startswith(DART_SCORES),
+               "🎯 Must start with a valid dart score.")
 
-        if not any(spice in value.lower() for spice in self.spices):
-            errors.append("🧂 Must include the name of a spice from your kitchen.")
+        yield ('spice', self.has_word(wordlists.SPICE, hits, val),
+               "🧂 Must include the name of a spice from your kitchen.")
 
-        # Final decision
-        if errors:
-            raise ValidationError(errors)
+    def fingerprint(self):
+        """Short digest of every setting the rules read, so differently configured
+        validators never share cached results or analyses."""
+        config = repr((self.mothers_maiden_letter, self.special_chars, self.musical_notes,
+                       self.nonexistent_countries, self.fictional_spaceships, self.spices))
+        return hashlib.blake2b(config.encode('utf-8', 'surrogatepass'), digest_size=8).hexdigest()
+
+    def has_word(self, group, hits, val):
+        """Whether lower-cased ``val`` contains a word of ``group`` (see CUSTOM_WORD_LISTS)."""
+        attr, default = CUSTOM_WORD_LISTS[group]
+        words = getattr(self, attr)
+        if tuple(words) == default:
+            return group in hits
+        return any(word.lower() in val for word in words)
+
+    def evaluate_many(self, passwords, now=None):
+        """Batch mode for offline audits: a rule x password bool matrix (needs numpy, see bulk.py)."""
+        from .bulk import evaluate_many
+        return evaluate_many(self, passwords, now)
 
     def _is_prime(self, n: int):
         if n < 2: return False
@@ -136,14 +228,9 @@ class UltraStrongPasswordValidator:
         return True
 
     def _contains_palindrome(self, s: str):
-        s_clean = ''.join(c.lower() for c in s if c.isalnum())
-        n = len(s_clean)
-        for i in range(n):
-            for j in range(i + 3, n + 1):
-                if s_clean[i:j] == s_clean[i:j][::-1]:
-                    return True
-        return False
+        s_clean = ''.join(c.lower() for c in s if flags_of(c) & ALNUM)
+        return contains_palindrome(s_clean, 3)
 
     def _is_calculator_compatible(self, s: str):
         calc_map = {'0': '0', '1': '1', '3': 'E', '4': 'h', '5': 'S', '6': '9', '7': 'L', '8': '8', '9': '6'}
-        return all(c in calc_map for c in s if c.isdigit())
+        return all(c in calc_map for c in s if flags_of(c) & DIGIT)
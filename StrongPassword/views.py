@@ -1,14 +1,114 @@
+import asyncio
+import datetime
+import json
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from . import attempts, constraints, leaderboard, metrics
+from .admission import admission_controlled
+from .batch import VALIDATORS, validate_batch
 from .forms import StrongPassword
+from .repair import suggest
+from .validators import UltraStrongPasswordValidator
 
+@admission_controlled
 def MakePassword(req):
+    suggestion = None
+    progress = None
     if req.method == 'POST':
         Pform = StrongPassword(req.POST)
         if Pform.is_valid():
             password = Pform.cleaned_data['password']
             print(f"Password: {password}")
-            return render(req, 'success.html', {'password': password})
+            progress = attempts.record(req, solved=True)
+            standings = leaderboard.submit(progress)
+            response = render(req, 'success.html', {
+                'password': password, 'progress': progress, 'standings': standings,
+            })
+            return attempts.remember(response, progress)
+        progress = attempts.record(req, solved=False)
+        # offer the closest passing password in the same response
+        if not Pform.has_error('password', 'required') and not Pform.has_error('password', 'unsatisfiable'):
+            suggestion = suggest(Pform.data.get('password', '').strip())
     else:
         Pform = StrongPassword()
 
-    return render(req, 'makepassword.html', {'form': Pform})
+    response = render(req, 'makepassword.html', {'form': Pform, 'suggestion': suggestion})
+    return attempts.remember(response, progress) if progress else response
+
+
+@csrf_exempt
+@require_POST
+@admission_controlled
+def BatchValidate(req):
+    # body: ["pw1", "pw2", ...] or {"passwords": [...], "validator": "strong" | "ultra"}
+    # response: NDJSON, one {"index", "valid", "errors"} line per password
+    try:
+        payload = json.loads(req.body)
+    except ValueError:
+        return JsonResponse({'error': 'Body must be JSON.'}, status=400)
+
+    validator = 'strong'
+    if isinstance(payload, dict):
+        validator = payload.get('validator', 'strong')
+        payload = payload.get('passwords')
+    if not isinstance(payload, list):
+        return JsonResponse({'error': 'Expected an array of passwords.'}, status=400)
+    if validator not in VALIDATORS:
+        return JsonResponse({'error': f"validator must be one of {', '.join(VALIDATORS)}."}, status=400)
+    if len(payload) > settings.STRONG_PASSWORD_BATCH_MAX_ITEMS:
+        return JsonResponse(
+            {'error': f"At most {settings.STRONG_PASSWORD_BATCH_MAX_ITEMS} passwords per request."},
+            status=413,
+        )
+
+    lines = (json.dumps(result) + '\n' for result in validate_batch(payload, validator))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
+def Metrics(req):
+    # Prometheus text format, summed across worker processes
+    if not metrics.enabled:
+        raise Http404("Metrics are disabled.")
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@csrf_exempt
+@require_POST
+@admission_controlled
+async def StreamValidate(req):
+    # Server-Sent Events: one 'rule' event per UltraStrongPasswordValidator rule
+    # as soon as it is decided, then 'done'. Runs on the event loop, so slow
+    # clients only hold a suspended generator, not a thread.
+    password = req.POST.get('password') or ''
+    if not password:
+        return JsonResponse({'error': 'password is required.'}, status=400)
+    if len(password) > settings.STRONG_PASSWORD_LIVE_MAX_LENGTH:
+        return JsonResponse({'error': 'password is too long.'}, status=413)
+
+    async def events():
+        validator = UltraStrongPasswordValidator()
+        now = datetime.datetime.now()
+        analysis = constraints.ultra_analysis(validator, now)
+        if not analysis.satisfiable:
+            yield _sse('unsatisfiable', {'message': analysis.message})
+        failed = 0
+        for code, ok, message in validator.evaluate(password, now):
+            failed += not ok
+            yield _sse('rule', {'code': code, 'ok': ok, 'message': None if ok else message})
+            # let other streams run between rules
+            await asyncio.sleep(0)
+        yield _sse('done', {'valid': not failed and analysis.satisfiable, 'failed': failed})
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,57 @@
+from django.conf import settings
+
+from .matcher import Automaton
+
+# Every word list used by the rules, matched together by one automaton (WORDS)
+# over the lower-cased password. Hits come back grouped by the names below.
+
+# Famous movies and their main/recognizable characters
+MOVIES = {
+    "Harry Potter": ["harry", "hermione", "ron", "dumbledore", "voldemort", "snape"],
+    "Star Wars": ["luke", "leia", "vader", "yoda", "han", "chewbacca"],
+    "Lord of the Rings": ["frodo", "gandalf", "aragorn", "legolas", "gollum", "sauron"],
+    "Avengers": ["ironman", "thor", "hulk", "captainamerica", "blackwidow", "thanos"],
+    "The Matrix": ["neo", "trinity", "morpheus", "agentsmith"],
+    "Joker": ["joker", "arthur"],
+    "Inception": ["cobb", "arthur", "ariadne", "eames"],
+}
+
+# words whose reversal is a real word (dog -> god, desserts -> stressed, evil -> live)
+REVERSED_WORDS = ('dog', 'desserts', 'evil')
+
+NONEXISTENT_COUNTRIES = ('Yugoslavia', 'Czechoslovakia', 'Siam', 'Prussia', 'OttomanEmpire', 'EastGermany')
+FICTIONAL_SPACESHIPS = ('MillenniumFalcon', 'Serenity', 'Enterprise', 'Galactica', 'Rocinante')
+SPICES = ('turmeric', 'cumin', 'paprika', 'saffron', 'basil')
+
+# group names
+MOVIE_CHARACTER = 'movie_character'
+REVERSED_WORD = 'reversed_word'
+PASSWORD = 'password'
+ADMIN = 'admin'
+COUNTRY = 'country'
+SPACESHIP = 'spaceship'
+SPICE = 'spice'
+NINETY = 'ninety'
+NUMBER_69_420 = 'number_69_420'
+BANNED = 'banned'
+
+WORDS = Automaton({
+    MOVIE_CHARACTER: [c for chars in MOVIES.values() for c in chars],
+    REVERSED_WORD: REVERSED_WORDS,
+    PASSWORD: ['password'],
+    ADMIN: ['admin'],
+    COUNTRY: NONEXISTENT_COUNTRIES,
+    SPACESHIP: FICTIONAL_SPACESHIPS,
+    SPICE: SPICES,
+    # digits are unchanged by lower(), so these match the raw password too
+    NINETY: ['90'],
+    NUMBER_69_420: [str(n) for n in range(69, 421)],
+})
+
+# Operators can ban extra words (or single characters) with a plain text file,
+# one entry per line.
+_banned_file = getattr(settings, 'STRONG_PASSWORD_BANNED_WORDS_FILE', None)
+if _banned_file:
+    WORDS.add_file(BANNED, _banned_file)
+
+WORDS.build()
@@ -0,0 +1,97 @@
+"""Micro-benchmarks for the validator hot paths.
+
+    python -m benchmarks                  # from the project root: run, compare with the baseline
+    python -m benchmarks --save           # run and record a new baseline
+    python -m benchmarks -k palindrome    # only benchmarks whose name matches
+
+Each benchmark is timed with timeit: the loop count is calibrated to roughly
+--min-time seconds, the loop is repeated --repeat times and the fastest repeat
+is kept (the least disturbed by the rest of the machine). Results are ns per
+call.
+
+A baseline is only meaningful on the machine that recorded it, so none is
+checked in; record one with --save before changing the validators, then rerun
+after the change. The run exits with status 1 when any benchmark is slower
+than its baseline by more than --threshold (a fraction, default 0.25).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from pathlib import Path
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def _setup_django():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'StrongPassword.settings')
+    import django
+    django.setup()
+
+
+def measure(fn, repeat, min_time):
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    # autorange stops at >= 0.2 s; scale to the requested time per repeat
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n\n')[0])
+    parser.add_argument('-k', dest='pattern', default='', help="Only run benchmarks whose name contains this.")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help="Write the results as the new baseline.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, as a fraction (default 0.25).")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help="Seconds per repeat (default 0.1).")
+    args = parser.parse_args(argv)
+
+    _setup_django()
+    from .cases import cases, frozen_clock, uncached, ultra_reachable
+
+    baseline = {}
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text())['results']
+
+    results = {}
+    regressions = []
+    with frozen_clock(), uncached(), ultra_reachable():
+        for name, fn in cases():
+            if args.pattern not in name:
+                continue
+            ns = results[name] = measure(fn, args.repeat, args.min_time)
+            line = f'{name:<60} {ns:>14,.0f} ns'
+            if name in baseline:
+                change = ns / baseline[name] - 1
+                line += f'  {change:+7.1%}'
+                if change > args.threshold:
+                    regressions.append(name)
+                    line += '  REGRESSION'
+            print(line, flush=True)
+
+    if args.save:
+        args.baseline.write_text(json.dumps({
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'results': results,
+        }, indent=2) + '\n')
+        print(f'Baseline written to {args.baseline}.')
+    elif not baseline:
+        print(f'No baseline at {args.baseline}; record one with --save.')
+
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}:')
+        for name in regressions:
+            print(f'  {name}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Benchmark inputs and the functions timed on them.
+
+Everything is deterministic: inputs come from fixed seeds and the validators
+see a frozen clock, so the hour and weekday rules always evaluate the same way.
+
+The StrongPassword rules stop at the first failure, so clean_password is
+timed on generated passwords that pass every rule, and the adversarial
+inputs start with a special character, end with a digit and have a
+perfect-square length to get past the structural checks. No password can
+pass UltraStrongPasswordValidator at any hour (see constraints.py), so
+ultra.__call__ is timed with that analysis taken out.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+
+from StrongPassword import constraints, generator, validators
+from StrongPassword.cache import RESULTS
+from StrongPassword.forms import StrongPassword
+
+# Monday 16:00, the length-hour rule then asks for 16 characters
+FROZEN_NOW = datetime.datetime(2024, 1, 1, 16, 0, 0)
+
+# perfect squares and multiples of 4, like every admissible length
+LENGTHS = (16, 64, 1024, 10_000)
+# generated passwords are at least ~36 characters and at most
+# constraints.LENGTH_CAP
+VALID_LENGTHS = (0, 64, 1024)
+
+_ASCII = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*-_.,;:'
+# Greek, Cyrillic, CJK, musical notes and emoji; no ASCII at all
+_UNICODE = [chr(cp) for cp in (*range(0x3b1, 0x3ca), *range(0x430, 0x450),
+                               *range(0x4e00, 0x4e40), 0x266a, 0x266b, 0x266c,
+                               *range(0x1f600, 0x1f640))]
+
+
+class _FrozenDateTime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return FROZEN_NOW
+
+
+@contextmanager
+def frozen_clock():
+    """Make validators.py see FROZEN_NOW as the current time."""
+    # validators.py only uses datetime.datetime; a plain namespace keeps the
+    # patch itself out of the timings
+    with mock.patch.object(validators, 'datetime', SimpleNamespace(datetime=_FrozenDateTime)):
+        yield
+
+
+@contextmanager
+def ultra_reachable():
+    """Let UltraStrongPasswordValidator.__call__ run its rules despite the conflict analysis."""
+    satisfiable = constraints.Analysis([], [])
+    with mock.patch.object(constraints, 'ultra_analysis', lambda validator, now=None: satisfiable):
+        yield
+
+
+@contextmanager
+def uncached():
+    """Disable the result cache so every call runs the rules."""
+    maxsize, alias = RESULTS.maxsize, RESULTS.alias
+    RESULTS.maxsize, RESULTS.alias = 0, None
+    RESULTS.clear()
+    try:
+        yield
+    finally:
+        RESULTS.maxsize, RESULTS.alias = maxsize, alias
+
+
+def make_input(kind, length):
+    rng = random.Random(f'{kind}:{length}')
+    if kind == 'valid':
+        return generator.generate_strong(rng, min_length=length)
+    # the body sits between a special first and a digit last character
+    size = length - 2
+    if kind == 'random':
+        body = ''.join(rng.choice(_ASCII) for _ in range(size))
+    elif kind == 'no_palindrome':
+        # 'Abc' repeated has no palindromic 3- or 4-window, so the palindrome
+        # scan has to walk all of it
+        body = ('Abc' * length)[:size]
+    elif kind == 'unicode':
+        body = ''.join(rng.choice(_UNICODE) for _ in range(size))
+    else:
+        raise ValueError(kind)
+    return '!' + body + '7'
+
+
+KINDS = ('random', 'no_palindrome', 'unicode')
+
+
+def _swallow(fn, *args):
+    try:
+        fn(*args)
+    except ValidationError:
+        pass
+
+
+def cases():
+    """Yield ``(name, zero-argument callable)`` for every benchmark."""
+    ultra = validators.UltraStrongPasswordValidator()
+    form = StrongPassword()
+
+    def clean_password(value):
+        form.cleaned_data = {'password': value}
+        return form.clean_password()
+
+    for length in VALID_LENGTHS:
+        value = make_input('valid', length)
+        yield f'strong.clean_password[valid,{len(value)}]', lambda v=value: clean_password(v)
+
+    for kind in KINDS:
+        for length in LENGTHS:
+            value = make_input(kind, length)
+            tag = f'[{kind},{length}]'
+            yield f'strong.clean_password{tag}', lambda v=value: _swallow(clean_password, v)
+            yield f'ultra.__call__{tag}', lambda v=value: _swallow(ultra, v)
+            yield f'ultra.evaluate{tag}', lambda v=value: list(ultra.evaluate(v, FROZEN_NOW))
+            yield f'ultra._contains_palindrome{tag}', lambda v=value: ultra._contains_palindrome(v)
+            yield f'ultra._is_calculator_compatible{tag}', lambda v=value: ultra._is_calculator_compatible(v)
+
+    # trial division, so the cost grows with sqrt(n)
+    for n in (97, 1_000_003, 2_147_483_647):
+        yield f'ultra._is_prime[{n}]', lambda n=n: ultra._is_prime(n)
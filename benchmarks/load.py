@@ -0,0 +1,369 @@
+"""In-process load harness for the real request path.
+
+    python -m benchmarks.load                         # from the project root
+    python -m benchmarks.load --server asgi --concurrency 32 --requests 5000
+
+Drives StrongPassword.wsgi.application and/or StrongPassword.asgi.application
+directly, without sockets: WSGI requests are issued from a thread pool, ASGI
+requests as concurrent tasks on one event loop. Each client first GETs the
+form for a CSRF cookie and token, then POSTs a mix of passwords from
+generator.py (valid) and mutations of them (invalid), so the whole stack runs
+(middleware, sessions, CSRF, MakePassword, form validation, repair
+suggestions and template rendering).
+
+Per request the time is split into phases by wrapping the Django handler's
+view call, check_password, repair.suggest and template rendering:
+
+    middleware   everything outside the view (handler and middleware chain)
+    view         the view itself, minus the phases below
+    validation   StrongPassword.clean_password -> rules.check_password
+    repair       the nearest-valid-password suggestion for rejected input
+    template     rendering makepassword.html / success.html
+
+The result cache is left as configured; pass --uncached to measure every
+request running the rules. Each client has its own address; the per-client
+rate limit is off unless --rate-limit is given, queue-time shedding stays on.
+"""
+import argparse
+import asyncio
+import contextvars
+import io
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from functools import wraps
+from pathlib import Path
+from urllib.parse import urlencode
+
+PHASES = ('middleware', 'view', 'validation', 'repair', 'template')
+
+_phases = contextvars.ContextVar('phases', default=None)
+_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def _setup_django():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'StrongPassword.settings')
+    import django
+    django.setup()
+
+
+# --- phase instrumentation
+
+def _add(name, seconds):
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] += seconds
+
+
+def _timed(name, fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _add(name, time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_async(name, fn):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _add(name, time.perf_counter() - start)
+    return wrapper
+
+
+@contextmanager
+def instrumented():
+    from django.core.handlers.base import BaseHandler
+    from django.template.backends.django import Template
+    from StrongPassword import forms, views
+
+    original_render = Template.render
+
+    def render(self, *args, **kwargs):
+        phases = _phases.get()
+        if phases is not None:
+            phases['templates'].append(self.origin.template_name)
+        return original_render(self, *args, **kwargs)
+
+    patches = [
+        (BaseHandler, '_get_response', _timed('_view', BaseHandler._get_response)),
+        (BaseHandler, '_get_response_async', _timed_async('_view', BaseHandler._get_response_async)),
+        (forms, 'check_password', _timed('validation', forms.check_password)),
+        (views, 'suggest', _timed('repair', views.suggest)),
+        (Template, 'render', _timed('template', render)),
+    ]
+    saved = [(owner, name, getattr(owner, name)) for owner, name, _ in patches]
+    for owner, name, value in patches:
+        setattr(owner, name, value)
+    try:
+        yield
+    finally:
+        for owner, name, value in saved:
+            setattr(owner, name, value)
+
+
+def _new_phases():
+    phases = defaultdict(float)
+    phases['templates'] = []
+    return phases
+
+
+def _split(total, phases):
+    view = phases['_view']
+    inner = phases['validation'] + phases['repair'] + phases['template']
+    return {
+        'total': total,
+        'middleware': total - view,
+        'view': view - inner,
+        'validation': phases['validation'],
+        'repair': phases['repair'],
+        'template': phases['template'],
+    }
+
+
+# --- payloads
+
+def payloads(count, valid_ratio, seed):
+    """``count`` (password, expected_valid) pairs."""
+    from StrongPassword.generator import generate_many
+    rng = random.Random(seed)
+    valid = list(generate_many(max(1, count // 4), seed=seed))
+    mutations = (
+        lambda p: p[:-4],                          # too short for the length rules
+        lambda p: p.replace('-', '', 1),           # no dash
+        lambda p: p[1:],                           # first character no longer special
+        lambda p: p[:8] + ' ' + p[9:],             # a space
+        lambda p: p.lower(),                       # no uppercase
+    )
+    out = []
+    for _ in range(count):
+        password = rng.choice(valid)
+        if rng.random() < valid_ratio:
+            out.append((password, True))
+        else:
+            out.append((rng.choice(mutations)(password), False))
+    return out
+
+
+# --- WSGI
+
+def _wsgi_call(app, method, body=b'', cookie='', client='127.0.0.1'):
+    from wsgiref.util import setup_testing_defaults
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': '/',
+        'SERVER_NAME': 'localhost',
+        'HTTP_HOST': 'localhost',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_COOKIE': cookie,
+        'REMOTE_ADDR': client,
+        'wsgi.input': io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split()[0])
+        response['headers'] = headers
+
+    result = app(environ, start_response)
+    try:
+        content = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], content
+
+
+def _cookies(jar, headers):
+    # keep the cookies a browser would send back (csrftoken, the attempts cookie)
+    for k, v in headers:
+        if k.lower() == 'set-cookie':
+            name, _, value = v.split(';', 1)[0].partition('=')
+            jar[name] = value
+    return '; '.join(f'{name}={value}' for name, value in jar.items())
+
+
+def _csrf(content):
+    return _TOKEN.search(content).group(1).decode()
+
+
+def _addresses(count):
+    return [f'10.0.{i // 250}.{i % 250 + 1}' for i in range(count)]
+
+
+def _form_body(password, token):
+    return urlencode({'password': password, 'csrfmiddlewaretoken': token}).encode()
+
+
+def run_wsgi(items, concurrency):
+    from StrongPassword.wsgi import application
+    chunks = [items[i::concurrency] for i in range(concurrency)]
+
+    def client(chunk, address):
+        jar = {}
+        status, headers, content = _wsgi_call(application, 'GET', client=address)
+        cookie, token = _cookies(jar, headers), _csrf(content)
+        samples = []
+        for password, expected in chunk:
+            phases = _new_phases()
+            _phases.set(phases)
+            start = time.perf_counter()
+            status, headers, _ = _wsgi_call(application, 'POST', _form_body(password, token), cookie, address)
+            total = time.perf_counter() - start
+            _phases.set(None)
+            cookie = _cookies(jar, headers)
+            samples.append((status, expected, phases['templates'], _split(total, phases)))
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = [s for samples in pool.map(client, chunks, _addresses(len(chunks))) for s in samples]
+    return results, time.perf_counter() - start
+
+
+# --- ASGI
+
+async def _asgi_call(app, method, body=b'', cookie='', client='127.0.0.1'):
+    headers = [(b'host', b'localhost'),
+               (b'content-type', b'application/x-www-form-urlencoded'),
+               (b'content-length', str(len(body)).encode())]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': '/', 'raw_path': b'/',
+        'query_string': b'', 'root_path': '', 'headers': headers,
+        'client': (client, 0), 'server': ('localhost', 80),
+    }
+    sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # the client stays connected until the response is complete
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    response = {'headers': [], 'body': []}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = [(k.decode(), v.decode()) for k, v in message.get('headers', [])]
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return response['status'], response['headers'], b''.join(response['body'])
+
+
+def run_asgi(items, concurrency):
+    from StrongPassword.asgi import application
+    chunks = [items[i::concurrency] for i in range(concurrency)]
+
+    async def client(chunk, address):
+        jar = {}
+        status, headers, content = await _asgi_call(application, 'GET', client=address)
+        cookie, token = _cookies(jar, headers), _csrf(content)
+        samples = []
+        for password, expected in chunk:
+            phases = _new_phases()
+            _phases.set(phases)
+            start = time.perf_counter()
+            status, headers, _ = await _asgi_call(application, 'POST', _form_body(password, token), cookie, address)
+            total = time.perf_counter() - start
+            _phases.set(None)
+            cookie = _cookies(jar, headers)
+            samples.append((status, expected, phases['templates'], _split(total, phases)))
+        return samples
+
+    async def main():
+        # every client task runs in its own copy of the context, so the
+        # phase accumulator is per request
+        return await asyncio.gather(*(client(chunk, address) for chunk, address in zip(chunks, _addresses(len(chunks)))))
+
+    start = time.perf_counter()
+    results = [s for samples in asyncio.run(main()) for s in samples]
+    return results, time.perf_counter() - start
+
+
+# --- report
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def report(server, samples, elapsed, out=sys.stdout):
+    statuses = Counter(status for status, _, _, _ in samples)
+    accepted = [any(t == 'success.html' for t in templates) for _, _, templates, _ in samples]
+    mismatched = sum(1 for (_, expected, _, _), ok in zip(samples, accepted) if expected != ok)
+    print(f"\n{server.upper()}: {len(samples)} requests in {elapsed:.2f} s "
+          f"= {len(samples) / elapsed:,.0f} req/s; statuses {dict(statuses)}; "
+          f"{sum(accepted)} accepted, {mismatched} not as expected", file=out)
+    print(f"{'phase (ms)':<12} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}", file=out)
+    for phase in ('total',) + PHASES:
+        values = [split[phase] * 1000 for _, _, _, split in samples]
+        print(f"{phase:<12} {sum(values) / len(values):>9.3f} {percentile(values, 50):>9.3f} "
+              f"{percentile(values, 95):>9.3f} {percentile(values, 99):>9.3f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--server', choices=('wsgi', 'asgi', 'both'), default='both')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--valid-ratio', type=float, default=0.5,
+                        help="Fraction of POSTs with a password that passes (default 0.5).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--uncached', action='store_true', help="Disable the validation result cache.")
+    parser.add_argument('--rate-limit', action='store_true',
+                        help="Keep STRONG_PASSWORD_RATE_LIMIT on (expect 429s at high rates).")
+    args = parser.parse_args(argv)
+
+    _setup_django()
+    if not args.rate_limit:
+        from django.conf import settings
+        settings.STRONG_PASSWORD_RATE_LIMIT = 0
+    from .cases import uncached
+
+    items = payloads(args.requests, args.valid_ratio, args.seed)
+    servers = ('wsgi', 'asgi') if args.server == 'both' else (args.server,)
+    cache = uncached() if args.uncached else contextmanager(lambda: (yield))()
+    with cache, instrumented():
+        for server in servers:
+            run = run_wsgi if server == 'wsgi' else run_asgi
+            # MakePassword prints every accepted password
+            with redirect_stdout(io.StringIO()):
+                samples, elapsed = run(items, args.concurrency)
+            report(server, samples, elapsed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+// Small stand-in for canvas-confetti: confetti({particleCount, angle, spread,
+// origin}) with the same defaults, drawn on <canvas id="confetti">.
+(function () {
+  "use strict";
+
+  const COLORS = ["#26ccff", "#a25afd", "#ff5e7e", "#88ff5a", "#fcff42", "#ffa62d", "#ff36ff"];
+  const reducedMotion = window.matchMedia("(prefers-reduced-motion: reduce)").matches;
+  let canvas = null;
+  let ctx = null;
+  let particles = [];
+  let running = false;
+
+  function setup() {
+    canvas = document.getElementById("confetti");
+    if (!canvas) {
+      canvas = document.createElement("canvas");
+      canvas.id = "confetti";
+      document.body.appendChild(canvas);
+    }
+    ctx = canvas.getContext("2d");
+  }
+
+  function resize() {
+    if (canvas.width !== window.innerWidth || canvas.height !== window.innerHeight) {
+      canvas.width = window.innerWidth;
+      canvas.height = window.innerHeight;
+    }
+  }
+
+  function particle(options) {
+    // angle in degrees, 90 is straight up; the spread is split around it
+    const angle = -options.angle * Math.PI / 180;
+    const spread = options.spread * Math.PI / 180;
+    return {
+      x: options.origin.x * canvas.width,
+      y: options.origin.y * canvas.height,
+      direction: angle + (0.5 * spread - Math.random() * spread),
+      velocity: options.startVelocity * (0.5 + Math.random()),
+      wobble: Math.random() * 10,
+      wobbleSpeed: 0.05 + Math.random() * 0.06,
+      tilt: Math.random() * Math.PI,
+      color: COLORS[Math.floor(Math.random() * COLORS.length)],
+      tick: 0,
+      ticks: options.ticks,
+    };
+  }
+
+  function step(p) {
+    p.x += Math.cos(p.direction) * p.velocity;
+    p.y += Math.sin(p.direction) * p.velocity + 3;
+    p.velocity *= 0.9;
+    p.wobble += p.wobbleSpeed;
+    p.tilt += 0.1;
+    p.tick += 1;
+    const w = 10 * Math.cos(p.wobble);
+    const h = 10 * Math.sin(p.tilt);
+    ctx.globalAlpha = 1 - p.tick / p.ticks;
+    ctx.fillStyle = p.color;
+    ctx.fillRect(p.x + Math.sin(p.wobble) * 5, p.y, w, h);
+    return p.tick < p.ticks;
+  }
+
+  function frame() {
+    resize();
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    particles = particles.filter(step);
+    if (particles.length) {
+      requestAnimationFrame(frame);
+    } else {
+      running = false;
+    }
+  }
+
+  window.confetti = function (options) {
+    if (reducedMotion) {
+      return;
+    }
+    if (!canvas) {
+      setup();
+      resize();
+    }
+    options = Object.assign({particleCount: 50, angle: 90, spread: 45, startVelocity: 45, ticks: 200}, options);
+    options.origin = Object.assign({x: 0.5, y: 0.6}, options.origin);
+    for (let i = 0; i < options.particleCount; i++) {
+      particles.push(particle(options));
+    }
+    if (!running) {
+      running = true;
+      requestAnimationFrame(frame);
+    }
+  };
+}());
@@ -0,0 +1,21 @@
+// Confetti burst
+const duration = 5 * 1000;
+const end = Date.now() + duration;
+
+(function frame() {
+  confetti({
+    particleCount: 3,
+    angle: 60,
+    spread: 55,
+    origin: { x: 0 }
+  });
+  confetti({
+    particleCount: 3,
+    angle: 120,
+    spread: 55,
+    origin: { x: 1 }
+  });
+  if (Date.now() < end) {
+    requestAnimationFrame(frame);
+  }
+}());